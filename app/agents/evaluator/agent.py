@@ -17,7 +17,7 @@ from app.agents.evaluator.nodes.qa_extraction import extract_qa_pairs
 from app.agents.evaluator.nodes.evaluation_node import evaluate_criteria_node
 from app.agents.evaluator.nodes.summary_node import generate_summary_node
 from app.agents.evaluator.nodes.storage_node import store_results_node
-from app.services.langsmith import langsmith_service
+from app.services.langsmith import get_langsmith_service
 
 logger = logging.getLogger(__name__)
 
@@ -25,7 +25,7 @@ from app.agents.evaluator.prompts.evaluation_prompts import (
     EVALUATOR_SYSTEM_PROMPT,
     CRITERIA_PROMPTS
 )
-from app.services.langsmith import langsmith_service
+from app.services.langsmith import get_langsmith_service
 
 logger = logging.getLogger(__name__)
 
@@ -78,7 +78,7 @@ async def evaluate_criterion(
             raise ValueError("OPENAI_API_KEY environment variable not set")
         
         # Create a trace for this evaluation
-        trace_id = langsmith_service.trace_run(
+        trace_id = await get_langsmith_service().trace_run(
             name=f"evaluate_{criterion_name.lower()}",
             inputs={
                 "criterion": criterion_name,
@@ -9,12 +9,13 @@ import logging
 from typing import Tuple, Dict, Any
 
 from app.agents.evaluator.state import InterviewEvaluationState, EvaluationStatus
-from app.services.supabase_client import supabase_service
+from app.models.models import STATUS_EVALUATED
+from app.services.supabase_client import get_supabase_client
 
 logger = logging.getLogger(__name__)
 
 
-def store_results_node(state: InterviewEvaluationState) -> Tuple[InterviewEvaluationState, str]:
+async def store_results_node(state: InterviewEvaluationState) -> Tuple[InterviewEvaluationState, str]:
     """
     Store evaluation results in Supabase.
     
@@ -56,13 +57,14 @@ def store_results_node(state: InterviewEvaluationState) -> Tuple[InterviewEvalua
             })
         
         # Store the results in Supabase
-        success = supabase_service.store_evaluation_results(state.interview_id, results)
+        supabase_service = get_supabase_client()
+        success = await supabase_service.store_evaluation_results(state.interview_id, results)
         
         if success:
             logger.info(f"Successfully stored results for interview {state.interview_id}")
             
             # Update the status
-            supabase_service.update_interview_status(state.interview_id, "evaluated")
+            await supabase_service.update_interview_status(state.interview_id, STATUS_EVALUATED)
             
             # Update the state
             state.status = EvaluationStatus.COMPLETE
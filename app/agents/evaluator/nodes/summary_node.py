@@ -19,7 +19,7 @@ from app.agents.evaluator.state import (
     EvaluationStatus
 )
 from app.agents.evaluator.prompts.evaluation_prompts import SUMMARY_GENERATION_PROMPT
-from app.services.langsmith import langsmith_service
+from app.services.langsmith import get_langsmith_service
 
 logger = logging.getLogger(__name__)
 
@@ -73,7 +73,7 @@ async def generate_summary_node(state: InterviewEvaluationState) -> Tuple[Interv
             raise ValueError("OPENAI_API_KEY environment variable not set")
         
         # Create a trace for this summary generation
-        trace_id = langsmith_service.trace_run(
+        trace_id = await get_langsmith_service().trace_run(
             name="generate_summary",
             inputs={
                 "candidate_name": state.candidate_name,
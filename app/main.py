@@ -9,25 +9,25 @@ from datetime import datetime, timedelta
 from typing import Dict, Any, Optional
 
 import sentry_sdk
-from fastapi import BackgroundTasks, Depends, FastAPI, File, HTTPException, Request, UploadFile
+from fastapi import BackgroundTasks, Depends, FastAPI, File, HTTPException, Query, Request, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, HTMLResponse
-from fastapi.staticfiles import StaticFiles
+from fastapi.responses import HTMLResponse, ORJSONResponse
 from sentry_sdk.integrations.fastapi import FastApiIntegration
 from sentry_sdk.integrations.logging import LoggingIntegration
 from sentry_sdk.integrations.starlette import StarletteIntegration
+from starlette.types import ASGIApp, Receive, Scope, Send
 from dotenv import load_dotenv
 
 from app.models.models import (
     AuthResponse, EvaluationRequest, EvaluationResponse, HealthCheckResponse,
-    InterviewStatus, MonitoringDataResponse, SystemStatus,
-    UserLogin, UserSignUp
+    MonitoringDataResponse, SystemStatus, UserLogin, UserSignUp,
+    STATUS_ERROR, STATUS_PROCESSING, STATUS_UPLOADED
 )
 from app.services.alerting import get_alerting_service
 from app.services.auth_service import get_current_user, auth_service
 from app.services.cost_monitoring import get_cost_monitoring_service
 from app.services.evaluation_service import evaluate_interview
-from app.services.langsmith.client import langsmith_service as get_langsmith_client
+from app.services.langsmith.client import get_langsmith_service
 from app.services.monitoring import get_monitoring_service
 from app.services.supabase_client import get_supabase_client
 from app.services.transcript_processor import transcript_processor
@@ -45,6 +45,11 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Pre-built landing page, read once at import time
+STATIC_DIR = os.path.join(os.path.dirname(__file__), "static")
+with open(os.path.join(STATIC_DIR, "index.html"), "rb") as landing_page_file:
+    LANDING_PAGE_HTML = landing_page_file.read()
+
 # Initialize Sentry
 if os.environ.get("SENTRY_DSN"):
     sentry_sdk.init(
@@ -64,10 +69,12 @@ if os.environ.get("SENTRY_DSN"):
     logger.info("Sentry initialized for error tracking and monitoring")
 
 # Create FastAPI app
+# ORJSONResponse renders responses with orjson instead of stdlib json
 app = FastAPI(
     title="Interview Evaluator API",
     description="API for evaluating data scientist interview transcripts using AI",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
 # Configure CORS
@@ -118,6 +125,7 @@ async def startup_event():
     """Run scheduled tasks on startup."""
     try:
         # Initialize services
+        await get_langsmith_service().startup()
         monitoring_service = get_monitoring_service()
         cost_monitoring_service = get_cost_monitoring_service()
         alerting_service = get_alerting_service()
@@ -134,6 +142,24 @@ async def startup_event():
         sentry_sdk.capture_exception(e)
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Release shared resources on shutdown."""
+    # Close each service separately so one failure doesn't skip the rest
+    services = (
+        ("alerting", get_alerting_service),
+        ("monitoring", get_monitoring_service),
+        ("LangSmith", get_langsmith_service),
+        ("Supabase", get_supabase_client),
+    )
+    for name, get_service in services:
+        try:
+            await get_service().aclose()
+        except Exception as e:
+            logger.error(f"Error closing {name} service on shutdown: {e}")
+            sentry_sdk.capture_exception(e)
+
+
 # Authentication routes
 @app.post("/auth/login", response_model=AuthResponse, tags=["Authentication"])
 async def login(user_data: UserLogin):
@@ -162,13 +188,14 @@ async def login(user_data: UserLogin):
                 detail="Invalid email or password"
             )
             
-        # Return the token response
-        return AuthResponse(
+        # Return the token response directly so FastAPI skips re-validating it
+        response = AuthResponse(
             access_token=result.get("access_token"),
             user_id=result.get("user", {}).get("id", ""),
             email=user_data.email,
             expires_in=result.get("expires_in", 3600)
         )
+        return ORJSONResponse(content=response.model_dump(mode="json"))
         
     except HTTPException:
         # Re-raise HTTP exceptions
@@ -214,13 +241,14 @@ async def signup(user_data: UserSignUp):
                 detail="Failed to create user account"
             )
             
-        # Return the token response
-        return AuthResponse(
+        # Return the token response directly so FastAPI skips re-validating it
+        response = AuthResponse(
             access_token=result.get("access_token"),
             user_id=result.get("user", {}).get("id", ""),
             email=user_data.email,
             expires_in=result.get("expires_in", 3600)
         )
+        return ORJSONResponse(content=response.model_dump(mode="json"))
         
     except HTTPException:
         # Re-raise HTTP exceptions
@@ -247,12 +275,12 @@ async def process_interview_transcript(file_path: str, interview_id: str, user_i
         
         # Initialize services
         supabase = get_supabase_client()
-        langsmith = get_langsmith_client()
+        langsmith = get_langsmith_service()
         monitoring = get_monitoring_service(supabase, langsmith)
         
         # Update interview status to processing
         await supabase.table("interviews").update(
-            {"status": InterviewStatus.PROCESSING}
+            {"status": STATUS_PROCESSING}
         ).eq("id", interview_id).execute()
         
         # Extract candidate name from Supabase
@@ -291,7 +319,7 @@ async def process_interview_transcript(file_path: str, interview_id: str, user_i
             
             # Update interview status to error
             await supabase.table("interviews").update(
-                {"status": InterviewStatus.ERROR}
+                {"status": STATUS_ERROR}
             ).eq("id", interview_id).execute()
             
             # Create alert for failed evaluation
@@ -308,7 +336,7 @@ async def process_interview_transcript(file_path: str, interview_id: str, user_i
         # Update interview status to error
         supabase = get_supabase_client()
         await supabase.table("interviews").update(
-            {"status": InterviewStatus.ERROR}
+            {"status": STATUS_ERROR}
         ).eq("id", interview_id).execute()
         
         # Create alert for critical error
@@ -340,7 +368,7 @@ async def evaluate_endpoint(
     """
     try:
         # Initialize services
-        langsmith = get_langsmith_client()
+        langsmith = get_langsmith_service()
         supabase = get_supabase_client()
         monitoring = get_monitoring_service(supabase, langsmith)
         
@@ -388,18 +416,11 @@ async def evaluate_endpoint(
         )
 
 
-@app.get("/health", response_model=HealthCheckResponse, tags=["General"])
-async def health_check():
+def _build_health_response() -> bytes:
     """
-    Check the health of the API and its dependencies
-    Returns service status and uptime information.
+    Build the serialized health check response
+    Returns service status and dependency information.
     """
-    logger.info("Health check endpoint called")
-    
-    # Get monitoring service for system health
-    monitoring_service = get_monitoring_service()
-    health_data = await monitoring_service.get_system_health()
-    
     # Check Supabase connection
     supabase_status = SystemStatus.UP
     try:
@@ -413,7 +434,7 @@ async def health_check():
     # Check LangSmith connection - make this optional
     langsmith_status = SystemStatus.UP
     try:
-        langsmith = get_langsmith_client()
+        langsmith = get_langsmith_service()
         # Simple attribute check to see if it's initialized
         if not hasattr(langsmith, 'initialized') or not langsmith.initialized:
             langsmith_status = SystemStatus.DOWN
@@ -427,7 +448,50 @@ async def health_check():
         timestamp=datetime.now().isoformat(),
         supabase_status=supabase_status,
         langsmith_status=langsmith_status
-    )
+    ).model_dump_json().encode()
+
+
+async def health_asgi(scope: Scope, receive: Receive, send: Send) -> None:
+    """
+    Bare ASGI endpoint for GET /health
+    
+    Answers health checks without going through routing, dependency
+    injection or the CORS/monitoring middleware.
+    """
+    body = _build_health_response()
+    await send({
+        "type": "http.response.start",
+        "status": 200,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+        ],
+    })
+    await send({
+        "type": "http.response.body",
+        "body": body if scope["method"] != "HEAD" else b"",
+    })
+
+
+class HealthCheckMiddleware:
+    """Short-circuit /health before the rest of the middleware stack."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] == "http"
+            and scope["path"] == "/health"
+            and scope["method"] in ("GET", "HEAD")
+        ):
+            await health_asgi(scope, receive, send)
+            return
+        await self.app(scope, receive, send)
+
+
+# Added last so it wraps CORS and the monitoring middleware
+app.add_middleware(HealthCheckMiddleware)
 
 
 @app.get("/status/{interview_id}", tags=["Evaluation"])
@@ -451,7 +515,7 @@ async def get_interview_status(
         # Get the interview from Supabase
         supabase = get_supabase_client()
         if not supabase:
-            return JSONResponse(
+            return ORJSONResponse(
                 status_code=503,
                 content={
                     "status": "error",
@@ -463,7 +527,7 @@ async def get_interview_status(
         response = await supabase.table("interviews").select("*").eq("id", interview_id).execute()
         
         if not response.data:
-            return JSONResponse(
+            return ORJSONResponse(
                 status_code=404,
                 content={
                     "status": "error",
@@ -474,7 +538,7 @@ async def get_interview_status(
         interview = response.data[0]
         
         # Return the status
-        return JSONResponse(content={
+        return ORJSONResponse(content={
             "interview_id": interview_id,
             "status": interview.get("status", "unknown"),
             "candidate_name": interview.get("candidate_name", "Unknown"),
@@ -513,7 +577,7 @@ async def get_all_evaluations(
         # Get Supabase client
         supabase = get_supabase_client()
         if not supabase:
-            return JSONResponse(
+            return ORJSONResponse(
                 status_code=503,
                 content={
                     "status": "error",
@@ -530,7 +594,7 @@ async def get_all_evaluations(
             .execute()
         
         if not response.data:
-            return JSONResponse(
+            return ORJSONResponse(
                 content={
                     "status": "success",
                     "message": "No evaluations found",
@@ -539,7 +603,7 @@ async def get_all_evaluations(
             )
         
         # Return the results
-        return JSONResponse(content={
+        return ORJSONResponse(content={
             "status": "success",
             "data": response.data,
             "count": len(response.data),
@@ -599,12 +663,13 @@ async def get_monitoring_data(
         # Get system health
         system_health = await monitoring_service.get_system_health()
         
-        return MonitoringDataResponse(
+        response = MonitoringDataResponse(
             metrics=metrics,
             langsmith_metrics=langsmith_metrics,
             cost_projection=cost_projection,
             system_health=system_health
         )
+        return ORJSONResponse(content=response.model_dump(mode="json"))
     
     except HTTPException:
         raise
@@ -623,7 +688,8 @@ async def get_monitoring_data(
 async def get_alerts(
     user_id: str = Depends(get_current_user),
     resolved: Optional[bool] = None,
-    severity: Optional[str] = None
+    severity: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1)
 ):
     """
     Get system alerts
@@ -631,6 +697,7 @@ async def get_alerts(
     This endpoint:
     1. Retrieves alerts from the alerting service
     2. Filters by resolved status and severity
+    3. Returns the newest alerts first, up to the optional limit
     
     Requires authentication via JWT Bearer token with admin role.
     """
@@ -646,7 +713,7 @@ async def get_alerts(
             )
         
         alerting_service = get_alerting_service()
-        alerts = await alerting_service.get_alerts(severity=severity, resolved=resolved)
+        alerts = await alerting_service.get_alerts(severity=severity, resolved=resolved, limit=limit)
         
         return {"alerts": alerts}
     
@@ -812,7 +879,7 @@ async def get_evaluation_results(
         # Get Supabase client
         supabase = get_supabase_client()
         if not supabase:
-            return JSONResponse(
+            return ORJSONResponse(
                 status_code=503,
                 content={
                     "status": "error",
@@ -824,7 +891,7 @@ async def get_evaluation_results(
         response = await supabase.table("evaluations").select("*").eq("id", evaluation_id).execute()
         
         if not response.data:
-            return JSONResponse(
+            return ORJSONResponse(
                 status_code=404,
                 content={
                     "status": "error",
@@ -836,7 +903,7 @@ async def get_evaluation_results(
         
         # Check if the evaluation belongs to the current user
         if evaluation["user_id"] != user_id:
-            return JSONResponse(
+            return ORJSONResponse(
                 status_code=403,
                 content={
                     "status": "error",
@@ -845,7 +912,7 @@ async def get_evaluation_results(
             )
         
         # Return the evaluation results
-        return JSONResponse(content=evaluation)
+        return ORJSONResponse(content=evaluation)
         
     except Exception as e:
         logger.exception(f"Error getting evaluation results: {e}")
@@ -901,7 +968,7 @@ async def upload_transcript(
             "candidate_name": candidate_name,
             "interview_date": datetime.now().isoformat(),
             "transcript_storage_path": file_path,
-            "status": InterviewStatus.UPLOADED.value,
+            "status": STATUS_UPLOADED,
             "created_at": datetime.now().isoformat(),
             "updated_at": datetime.now().isoformat(),
         }
@@ -921,13 +988,13 @@ async def upload_transcript(
         await monitoring.record_metric("upload_count", 1)
         
         # Return response
-        return JSONResponse(
+        return ORJSONResponse(
             content={
                 "message": "Transcript uploaded successfully, processing started",
                 "interview_id": interview_id,
                 "candidate_name": candidate_name,
                 "filename": file.filename,
-                "status": InterviewStatus.UPLOADED.value
+                "status": STATUS_UPLOADED
             }
         )
         
@@ -950,75 +1017,14 @@ async def upload_transcript(
         )
 
 
-# API documentation and web page with Vercel Analytics
-@app.get("/", tags=["General"])
+# Landing page with Vercel Analytics. Only "/" is served, so unknown paths
+# and wrong methods on API routes still get FastAPI's 404/405 responses.
+@app.get("/", response_class=HTMLResponse, include_in_schema=False)
 async def root():
     """
-    Root endpoint that returns a simple HTML page with documentation links
-    """
-    # Create a simple HTML page with Vercel Analytics script
-    html_content = """
-    <!DOCTYPE html>
-    <html lang="en">
-    <head>
-        <meta charset="UTF-8">
-        <meta name="viewport" content="width=device-width, initial-scale=1.0">
-        <title>Interview Evaluator API</title>
-        <style>
-            body {
-                font-family: system-ui, -apple-system, sans-serif;
-                max-width: 800px;
-                margin: 0 auto;
-                padding: 20px;
-                line-height: 1.6;
-            }
-            h1 {
-                color: #333;
-            }
-            a {
-                color: #0070f3;
-                text-decoration: none;
-            }
-            a:hover {
-                text-decoration: underline;
-            }
-            .container {
-                background-color: #f7f7f7;
-                border-radius: 8px;
-                padding: 20px;
-                margin-top: 20px;
-            }
-        </style>
-    </head>
-    <body>
-        <h1>Interview Evaluator API</h1>
-        <p>Welcome to the Interview Evaluator API service. This API provides endpoints for evaluating data scientist interview transcripts.</p>
-        
-        <div class="container">
-            <h2>API Documentation</h2>
-            <p>For complete API documentation and interactive testing, visit:</p>
-            <ul>
-                <li><a href="/docs">Swagger UI Documentation</a></li>
-                <li><a href="/redoc">ReDoc Documentation</a></li>
-            </ul>
-            
-            <h2>Health Check</h2>
-            <p>To check the API health status, visit:</p>
-            <ul>
-                <li><a href="/health">Health Check Endpoint</a></li>
-                <li><a href="/cors-test">CORS Test Endpoint</a></li>
-            </ul>
-        </div>
-        
-        <!-- Vercel Web Analytics -->
-        <script>
-        window.va = window.va || function () { (window.vaq = window.vaq || []).push(arguments); };
-        </script>
-        <script defer src="/_vercel/insights/script.js"></script>
-    </body>
-    </html>
+    Root endpoint that returns the landing page with documentation links
     """
-    return HTMLResponse(content=html_content)
+    return HTMLResponse(content=LANDING_PAGE_HTML)
 
 
 if __name__ == "__main__":
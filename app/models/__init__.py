@@ -11,7 +11,11 @@ from .models import (
     HealthCheckResponse,
     UserLogin,
     UserSignUp,
-    AuthResponse
+    AuthResponse,
+    STATUS_UPLOADED,
+    STATUS_PROCESSING,
+    STATUS_EVALUATED,
+    STATUS_ERROR
 )
 
 __all__ = [
@@ -26,5 +30,9 @@ __all__ = [
     'HealthCheckResponse',
     'UserLogin',
     'UserSignUp',
-    'AuthResponse'
+    'AuthResponse',
+    'STATUS_UPLOADED',
+    'STATUS_PROCESSING',
+    'STATUS_EVALUATED',
+    'STATUS_ERROR'
 ]
\ No newline at end of file
@@ -4,10 +4,12 @@ Data models for the Interview Evaluator.
 This module defines the Pydantic models used for request and response validation.
 """
 
+import sys
 from datetime import datetime
 from enum import Enum
 from typing import List, Optional, Dict, Any, Union
-from pydantic import BaseModel, Field, EmailStr
+from pydantic import BaseModel, ConfigDict, Field, EmailStr
+from typing_extensions import NotRequired, TypedDict
 
 
 class InterviewStatus(str, Enum):
@@ -27,7 +29,9 @@ class SystemStatus(str, Enum):
 
 class UserLogin(BaseModel):
     """User login request model"""
-    email: EmailStr
+    # Plain str: Supabase rejects unknown emails anyway, so full email
+    # validation is only done at sign-up
+    email: str
     password: str
 
 
@@ -40,6 +44,7 @@ class UserSignUp(BaseModel):
 
 class AuthResponse(BaseModel):
     """Authentication response model"""
+    model_config = ConfigDict(defer_build=True, frozen=True)
     access_token: str
     token_type: str = "bearer"
     user_id: str
@@ -47,24 +52,27 @@ class AuthResponse(BaseModel):
     expires_in: int
 
 
-class EvaluationCriterion(BaseModel):
-    """Model for an evaluation criterion"""
+# Nested evaluation parts are TypedDicts so that only the top-level
+# response is a model; items stay plain dicts and validate cheaply.
+class EvaluationCriterion(TypedDict):
+    """Evaluation criterion nested in an evaluation response"""
     name: str
     score: float
     justification: str
-    supporting_quotes: List[str] = []
+    supporting_quotes: NotRequired[List[str]]
 
 
-class EvaluationSummary(BaseModel):
-    """Model for evaluation summary"""
+class EvaluationSummary(TypedDict):
+    """Evaluation summary"""
     overall_score: float
     summary: str
-    strengths: List[str] = []
-    weaknesses: List[str] = []
+    strengths: NotRequired[List[str]]
+    weaknesses: NotRequired[List[str]]
 
 
 class EvaluationResponse(BaseModel):
     """Model for evaluation response"""
+    model_config = ConfigDict(defer_build=True, frozen=True)
     status: str
     interview_id: Optional[str] = None
     candidate_name: Optional[str] = None
@@ -147,8 +155,17 @@ class DailyCostRecord(BaseModel):
 
 class HealthCheckResponse(BaseModel):
     """Response model for health check endpoint."""
+    model_config = ConfigDict(defer_build=True, frozen=True)
     status: str
     api_version: str
     timestamp: str
     supabase_status: SystemStatus
-    langsmith_status: SystemStatus
\ No newline at end of file
+    langsmith_status: SystemStatus
+
+
+# Interned status strings for internal hot paths (payloads sent to and
+# compared against Supabase rows). Keep InterviewStatus as the public API.
+STATUS_UPLOADED = sys.intern(InterviewStatus.UPLOADED.value)
+STATUS_PROCESSING = sys.intern(InterviewStatus.PROCESSING.value)
+STATUS_EVALUATED = sys.intern(InterviewStatus.EVALUATED.value)
+STATUS_ERROR = sys.intern(InterviewStatus.ERROR.value)
@@ -1,8 +1,8 @@
 # Import services to make them available from the package
-from .supabase_client import supabase_service
+from .supabase_client import get_supabase_client
 from .transcript_processor import transcript_processor
 
 __all__ = [
-    'supabase_service',
+    'get_supabase_client',
     'transcript_processor'
 ]
\ No newline at end of file
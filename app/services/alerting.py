@@ -3,15 +3,21 @@ Alerting service for the interview evaluator application.
 Handles alert creation, notification, and management.
 """
 
+import asyncio
 import logging
+import operator
 import os
+import time
+from collections import deque
+from dataclasses import dataclass
 from datetime import datetime
-from typing import Dict, List, Optional, Union
+from itertools import islice
+from typing import Callable, Deque, Dict, List, Optional, Tuple, Union
 
 import httpx
+import orjson
 import sentry_sdk
 from fastapi import HTTPException
-from pydantic import BaseModel, Field
 
 from app.services.monitoring import get_monitoring_service
 
@@ -35,26 +41,57 @@ ALERT_SEVERITY = {
 # Alert thresholds
 THRESHOLDS = {
     "error_rate": 5.0,  # Error rate percentage
-    "api_latency": 1000,  # API latency in ms
+    "api_latency": 1000.0,  # API latency in ms
     "evaluation_time": 60.0,  # Evaluation time in seconds
-    "token_usage_daily": 100000,  # Token usage per day
+    "token_usage_daily": 100000.0,  # Token usage per day
     "cost_daily": 10.0,  # Cost per day in USD
 }
 
+# How long metric values used by alert rules are reused (seconds)
+METRICS_CACHE_SECONDS = 60
 
-class AlertRule(BaseModel):
+# Maximum number of alerts kept in memory (oldest are dropped first)
+MAX_ALERTS = 10_000
+
+# Headers for pre-serialized JSON webhook payloads
+JSON_HEADERS = {"content-type": "application/json"}
+
+# Comparison operators supported by alert rules
+COMPARISON_OPERATORS: Dict[str, Callable[[float, float], bool]] = {
+    "gt": operator.gt,
+    "lt": operator.lt,
+    "eq": operator.eq,
+    "gte": operator.ge,
+    "lte": operator.le,
+}
+
+
+# Alert rules and alerts are created from trusted in-process data on every
+# check cycle, so they are plain dataclasses rather than Pydantic models to
+# avoid per-instance validation.
+@dataclass
+class AlertRule:
     """Alert rule configuration."""
     id: str
     name: str
     description: str
     metric: str
     threshold: float
-    comparison: str = Field(..., description="gt, lt, eq, gte, lte")
+    comparison: str  # gt, lt, eq, gte, lte
     severity: str
     enabled: bool = True
 
+    def __post_init__(self):
+        """Bind the comparison operator and severity handling once instead of on every check."""
+        if self.comparison not in COMPARISON_OPERATORS:
+            raise ValueError(f"Invalid comparison: {self.comparison}")
+        self._cmp = COMPARISON_OPERATORS[self.comparison]
+        self._log = getattr(logger, self.severity.lower(), logger.info)
+        self._notify = self.severity in ("CRITICAL", "ERROR")
+
 
-class Alert(BaseModel):
+@dataclass
+class Alert:
     """Alert model."""
     id: str
     timestamp: datetime
@@ -70,14 +107,19 @@ class Alert(BaseModel):
     acknowledged_at: Optional[datetime] = None
     notified: bool = False
 
+    def __post_init__(self):
+        """Resolve the notification color once per alert."""
+        self._color = "FF0000" if self.severity == "CRITICAL" else "FFA500"
+
 
 class AlertingService:
     """Service for managing alerts and notifications."""
 
     def __init__(self):
         """Initialize the alerting service."""
-        self.alerts: List[Alert] = []
-        self.rules: List[AlertRule] = [
+        self.alerts: Deque[Alert] = deque(maxlen=MAX_ALERTS)
+        self._alerts_by_id: Dict[str, Alert] = {}
+        default_rules = [
             AlertRule(
                 id="error-rate",
                 name="High Error Rate",
@@ -124,35 +166,51 @@ class AlertingService:
                 severity="ERROR",
             ),
         ]
+        # Rules keyed by ID (insertion-ordered, so iteration order is preserved)
+        self._rules_by_id: Dict[str, AlertRule] = {rule.id: rule for rule in default_rules}
+        
+        # Enabled rules, rebuilt lazily after any rule change
+        self._active_rules: Optional[Tuple[AlertRule, ...]] = None
+        
+        # Shared HTTP client for webhook notifications (created on first use)
+        self._http: Optional[httpx.AsyncClient] = None
+        
+        # (time bucket, metric values) from the last check
+        self._metrics_cache: Optional[Tuple[int, Dict[str, float]]] = None
+        
+        # Webhook URLs don't change at runtime, so resolve the configured
+        # senders once instead of checking every URL per notification
+        self._webhook_senders: List[Tuple[Callable, str]] = [
+            (sender, url)
+            for sender, url in (
+                (self._send_slack, WEBHOOK_URLS["slack"]),
+                (self._send_teams, WEBHOOK_URLS["teams"]),
+                (self._send_custom, WEBHOOK_URLS["custom"]),
+            )
+            if url
+        ]
+        
+    def _get_http_client(self) -> httpx.AsyncClient:
+        """Get the shared HTTP client, creating it if needed."""
+        if self._http is None or self._http.is_closed:
+            self._http = httpx.AsyncClient(timeout=10.0)
+        return self._http
+    
+    async def aclose(self):
+        """Close the shared HTTP client."""
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
         
     async def check_alert_conditions(self) -> List[Alert]:
         """Check all alert conditions and create alerts as needed."""
-        monitoring = get_monitoring_service()
         new_alerts = []
         
-        # Get metrics from monitoring service
-        metrics = await monitoring.get_metrics()
-        langsmith_metrics = await monitoring.get_langsmith_metrics()
-        cost_projection = await monitoring.get_cost_projection()
-        system_health = await monitoring.get_system_health()
-        
-        # Calculate derived metrics
-        error_rate = system_health.get("error_rate_24h", 0)
-        daily_cost = cost_projection.get("projected_monthly_cost_usd", 0) / 30
-        daily_tokens = cost_projection.get("projected_monthly_tokens", 0) / 30
-        
-        # Extend metrics with calculated values
-        metrics_values = {
-            "error_rate": error_rate,
-            "cost_daily": daily_cost,
-            "token_usage_daily": daily_tokens,
-        }
+        # Get metric values checked by the rules
+        metrics_values = await self._get_metric_values()
         
-        # Check each alert rule
-        for rule in self.rules:
-            if not rule.enabled:
-                continue
-                
+        # Check each enabled alert rule
+        for rule in self._get_active_rules():
             # Get the metric value
             value = metrics_values.get(rule.metric)
             
@@ -161,22 +219,10 @@ class AlertingService:
                 continue
                 
             # Check threshold
-            alert_triggered = False
-            
-            if rule.comparison == "gt" and value > rule.threshold:
-                alert_triggered = True
-            elif rule.comparison == "lt" and value < rule.threshold:
-                alert_triggered = True
-            elif rule.comparison == "eq" and value == rule.threshold:
-                alert_triggered = True
-            elif rule.comparison == "gte" and value >= rule.threshold:
-                alert_triggered = True
-            elif rule.comparison == "lte" and value <= rule.threshold:
-                alert_triggered = True
-                
-            if alert_triggered:
-                # Create alert
-                alert_id = f"{rule.id}-{datetime.now().strftime('%Y%m%d%H%M%S')}"
+            if rule._cmp(value, rule.threshold):
+                # Create alert (epoch nanoseconds keep IDs unique without date formatting)
+                now_ns = time.time_ns()
+                alert_id = f"{rule.id}-{now_ns}"
                 
                 # Format the message
                 message = f"{rule.name}: {rule.metric} is {value} (threshold: {rule.threshold})"
@@ -184,7 +230,7 @@ class AlertingService:
                 # Create the alert
                 alert = Alert(
                     id=alert_id,
-                    timestamp=datetime.now(),
+                    timestamp=datetime.fromtimestamp(now_ns / 1e9),
                     rule_id=rule.id,
                     severity=rule.severity,
                     message=message,
@@ -193,14 +239,17 @@ class AlertingService:
                     threshold=rule.threshold,
                 )
                 
-                # Add to alerts list
+                # Add to alerts, dropping the oldest one once the buffer is full
+                if len(self.alerts) == self.alerts.maxlen:
+                    evicted = self.alerts[0]
+                    if self._alerts_by_id.get(evicted.id) is evicted:
+                        del self._alerts_by_id[evicted.id]
                 self.alerts.append(alert)
+                self._alerts_by_id[alert.id] = alert
                 new_alerts.append(alert)
                 
                 # Log the alert
-                log_level = rule.severity.lower()
-                log_method = getattr(logger, log_level, logger.info)
-                log_method(f"Alert triggered: {message}")
+                rule._log(f"Alert triggered: {message}")
                 
                 # Create alert in monitoring service
                 monitoring_service = get_monitoring_service()
@@ -211,36 +260,66 @@ class AlertingService:
                 )
                 
                 # Send notification for critical and error alerts
-                if rule.severity in ["CRITICAL", "ERROR"]:
+                if rule._notify:
                     await self.send_notification(alert)
                     alert.notified = True
         
         return new_alerts
     
-    async def get_alerts(self, 
-                         severity: Optional[str] = None,
-                         resolved: Optional[bool] = None) -> List[Alert]:
-        """Get alerts filtered by severity and resolved status."""
-        filtered_alerts = self.alerts
-        
-        if severity:
-            filtered_alerts = [a for a in filtered_alerts if a.severity == severity]
-            
-        if resolved is not None:
-            filtered_alerts = [a for a in filtered_alerts if a.resolved == resolved]
+    def _get_active_rules(self) -> Tuple[AlertRule, ...]:
+        """Get the enabled rules, computed once per rule change rather than per check."""
+        if self._active_rules is None:
+            self._active_rules = tuple(rule for rule in self._rules_by_id.values() if rule.enabled)
+        return self._active_rules
+    
+    async def _get_metric_values(self) -> Dict[str, float]:
+        """Collect the metric values used by alert rules, cached per time window."""
+        bucket = int(time.time() // METRICS_CACHE_SECONDS)
+        if self._metrics_cache is not None and self._metrics_cache[0] == bucket:
+            return self._metrics_cache[1]
             
-        # Sort by timestamp (newest first)
-        filtered_alerts.sort(key=lambda a: a.timestamp, reverse=True)
+        monitoring = get_monitoring_service()
+        
+        # get_langsmith_metrics() records the LLM token usage that
+        # get_cost_projection() reads, so it must finish first
+        _, system_health = await asyncio.gather(
+            monitoring.get_langsmith_metrics(),
+            monitoring.get_system_health()
+        )
+        cost_projection = await monitoring.get_cost_projection()
         
-        return filtered_alerts
+        # Calculate derived metrics
+        error_rate = system_health.get("error_rate_24h", 0)
+        daily_cost = cost_projection.get("projected_monthly_cost_usd", 0) / 30
+        daily_tokens = cost_projection.get("projected_monthly_tokens", 0) / 30
+        
+        metrics_values = {
+            "error_rate": error_rate,
+            "cost_daily": daily_cost,
+            "token_usage_daily": daily_tokens,
+        }
+        
+        self._metrics_cache = (bucket, metrics_values)
+        return metrics_values
+    
+    async def get_alerts(self, 
+                         severity: Optional[str] = None,
+                         resolved: Optional[bool] = None,
+                         limit: Optional[int] = None) -> List[Alert]:
+        """Get the newest alerts filtered by severity and resolved status."""
+        # Alerts are appended in chronological order, so walking the buffer
+        # backwards yields newest first without sorting, and a limit can
+        # stop the scan early
+        matching = (
+            a for a in reversed(self.alerts)
+            if (not severity or a.severity == severity)
+            and (resolved is None or a.resolved == resolved)
+        )
+        return list(islice(matching, limit))
     
     async def get_alert(self, alert_id: str) -> Optional[Alert]:
         """Get an alert by ID."""
-        for alert in self.alerts:
-            if alert.id == alert_id:
-                return alert
-                
-        return None
+        return self._alerts_by_id.get(alert_id)
     
     async def resolve_alert(self, alert_id: str) -> Alert:
         """Resolve an alert."""
@@ -275,7 +354,7 @@ class AlertingService:
     async def send_notification(self, alert: Alert) -> bool:
         """Send notification for an alert."""
         # If no webhooks are configured, log and return
-        if not any(WEBHOOK_URLS.values()):
+        if not self._webhook_senders:
             logger.warning("No webhook URLs configured for alerting")
             return False
             
@@ -290,150 +369,164 @@ class AlertingService:
             "id": alert.id
         }
         
-        success = False
+        # Send to all configured webhooks concurrently
+        results = await asyncio.gather(
+            *(sender(url, alert, notification) for sender, url in self._webhook_senders),
+            return_exceptions=True
+        )
         
-        # Send to Slack
-        if WEBHOOK_URLS["slack"]:
-            try:
-                slack_payload = {
-                    "text": f"🚨 *{notification['title']}*",
-                    "attachments": [
-                        {
-                            "color": "#FF0000" if alert.severity == "CRITICAL" else "#FFA500",
-                            "fields": [
-                                {"title": "Message", "value": notification["message"], "short": False},
-                                {"title": "Metric", "value": notification["metric"], "short": True},
-                                {"title": "Value", "value": str(notification["value"]), "short": True},
-                                {"title": "Threshold", "value": str(notification["threshold"]), "short": True},
-                                {"title": "Time", "value": notification["timestamp"], "short": True},
-                                {"title": "ID", "value": notification["id"], "short": True}
-                            ],
-                            "footer": "Interview Evaluator Alerts"
-                        }
-                    ]
-                }
+        return any(result is True for result in results)
+    
+    async def _post_json(self, url: str, payload: Dict) -> httpx.Response:
+        """POST a payload serialized with orjson (much faster than json=)."""
+        return await self._get_http_client().post(
+            url,
+            content=orjson.dumps(payload),
+            headers=JSON_HEADERS
+        )
+    
+    async def _send_slack(self, url: str, alert: Alert, notification: Dict) -> bool:
+        """Send an alert notification to Slack."""
+        try:
+            slack_payload = {
+                "text": f"🚨 *{notification['title']}*",
+                "attachments": [
+                    {
+                        "color": f"#{alert._color}",
+                        "fields": [
+                            {"title": "Message", "value": notification["message"], "short": False},
+                            {"title": "Metric", "value": notification["metric"], "short": True},
+                            {"title": "Value", "value": str(notification["value"]), "short": True},
+                            {"title": "Threshold", "value": str(notification["threshold"]), "short": True},
+                            {"title": "Time", "value": notification["timestamp"], "short": True},
+                            {"title": "ID", "value": notification["id"], "short": True}
+                        ],
+                        "footer": "Interview Evaluator Alerts"
+                    }
+                ]
+            }
+            
+            response = await self._post_json(url, slack_payload)
+            
+            if response.status_code == 200:
+                logger.info(f"Slack notification sent for alert {alert.id}")
+                return True
                 
-                async with httpx.AsyncClient() as client:
-                    response = await client.post(
-                        WEBHOOK_URLS["slack"],
-                        json=slack_payload,
-                        timeout=10.0
-                    )
+            logger.error(f"Failed to send Slack notification: {response.text}")
+            return False
                     
-                    if response.status_code == 200:
-                        logger.info(f"Slack notification sent for alert {alert.id}")
-                        success = True
-                    else:
-                        logger.error(f"Failed to send Slack notification: {response.text}")
-                        
-            except Exception as e:
-                logger.error(f"Error sending Slack notification: {e}")
-                sentry_sdk.capture_exception(e)
-        
-        # Send to Teams
-        if WEBHOOK_URLS["teams"]:
-            try:
-                teams_payload = {
-                    "@type": "MessageCard",
-                    "@context": "http://schema.org/extensions",
-                    "themeColor": "FF0000" if alert.severity == "CRITICAL" else "FFA500",
-                    "summary": notification["title"],
-                    "sections": [
-                        {
-                            "activityTitle": f"🚨 {notification['title']}",
-                            "facts": [
-                                {"name": "Message", "value": notification["message"]},
-                                {"name": "Metric", "value": notification["metric"]},
-                                {"name": "Value", "value": str(notification["value"])},
-                                {"name": "Threshold", "value": str(notification["threshold"])},
-                                {"name": "Time", "value": notification["timestamp"]},
-                                {"name": "ID", "value": notification["id"]}
-                            ],
-                            "markdown": True
-                        }
-                    ]
-                }
+        except Exception as e:
+            logger.error(f"Error sending Slack notification: {e}")
+            sentry_sdk.capture_exception(e)
+            return False
+    
+    async def _send_teams(self, url: str, alert: Alert, notification: Dict) -> bool:
+        """Send an alert notification to Microsoft Teams."""
+        try:
+            teams_payload = {
+                "@type": "MessageCard",
+                "@context": "http://schema.org/extensions",
+                "themeColor": alert._color,
+                "summary": notification["title"],
+                "sections": [
+                    {
+                        "activityTitle": f"🚨 {notification['title']}",
+                        "facts": [
+                            {"name": "Message", "value": notification["message"]},
+                            {"name": "Metric", "value": notification["metric"]},
+                            {"name": "Value", "value": str(notification["value"])},
+                            {"name": "Threshold", "value": str(notification["threshold"])},
+                            {"name": "Time", "value": notification["timestamp"]},
+                            {"name": "ID", "value": notification["id"]}
+                        ],
+                        "markdown": True
+                    }
+                ]
+            }
+            
+            response = await self._post_json(url, teams_payload)
+            
+            if response.status_code == 200:
+                logger.info(f"Teams notification sent for alert {alert.id}")
+                return True
                 
-                async with httpx.AsyncClient() as client:
-                    response = await client.post(
-                        WEBHOOK_URLS["teams"],
-                        json=teams_payload,
-                        timeout=10.0
-                    )
+            logger.error(f"Failed to send Teams notification: {response.text}")
+            return False
                     
-                    if response.status_code == 200:
-                        logger.info(f"Teams notification sent for alert {alert.id}")
-                        success = True
-                    else:
-                        logger.error(f"Failed to send Teams notification: {response.text}")
-                        
-            except Exception as e:
-                logger.error(f"Error sending Teams notification: {e}")
-                sentry_sdk.capture_exception(e)
-        
-        # Send to custom webhook
-        if WEBHOOK_URLS["custom"]:
-            try:
-                custom_payload = {
-                    "alert": {
-                        "id": alert.id,
-                        "severity": alert.severity,
-                        "message": alert.message,
-                        "timestamp": alert.timestamp.isoformat(),
-                        "metric": alert.metric,
-                        "value": alert.value,
-                        "threshold": alert.threshold
-                    }
+        except Exception as e:
+            logger.error(f"Error sending Teams notification: {e}")
+            sentry_sdk.capture_exception(e)
+            return False
+    
+    async def _send_custom(self, url: str, alert: Alert, notification: Dict) -> bool:
+        """Send an alert notification to the custom webhook."""
+        try:
+            custom_payload = {
+                "alert": {
+                    "id": alert.id,
+                    "severity": alert.severity,
+                    "message": alert.message,
+                    "timestamp": alert.timestamp.isoformat(),
+                    "metric": alert.metric,
+                    "value": alert.value,
+                    "threshold": alert.threshold
                 }
+            }
+            
+            response = await self._post_json(url, custom_payload)
+            
+            if response.status_code == 200:
+                logger.info(f"Custom webhook notification sent for alert {alert.id}")
+                return True
                 
-                async with httpx.AsyncClient() as client:
-                    response = await client.post(
-                        WEBHOOK_URLS["custom"],
-                        json=custom_payload,
-                        timeout=10.0
-                    )
+            logger.error(f"Failed to send custom webhook notification: {response.text}")
+            return False
                     
-                    if response.status_code == 200:
-                        logger.info(f"Custom webhook notification sent for alert {alert.id}")
-                        success = True
-                    else:
-                        logger.error(f"Failed to send custom webhook notification: {response.text}")
-                        
-            except Exception as e:
-                logger.error(f"Error sending custom webhook notification: {e}")
-                sentry_sdk.capture_exception(e)
-        
-        return success
+        except Exception as e:
+            logger.error(f"Error sending custom webhook notification: {e}")
+            sentry_sdk.capture_exception(e)
+            return False
     
     async def get_alert_rules(self) -> List[AlertRule]:
         """Get all alert rules."""
-        return self.rules
+        return list(self._rules_by_id.values())
     
     async def update_alert_rule(self, rule_id: str, updates: Dict) -> AlertRule:
         """Update an alert rule."""
-        for i, rule in enumerate(self.rules):
-            if rule.id == rule_id:
-                # Update the rule
-                for key, value in updates.items():
-                    if hasattr(rule, key):
-                        setattr(rule, key, value)
-                        
-                # Log the update
-                logger.info(f"Alert rule {rule_id} updated: {updates}")
-                
-                return rule
+        if "comparison" in updates and updates["comparison"] not in COMPARISON_OPERATORS:
+            raise HTTPException(status_code=400, detail=f"Invalid comparison: {updates['comparison']}")
+        # Rules are indexed by ID and private fields are derived, so neither can be set here
+        protected = [key for key in updates if key == "id" or key.startswith("_")]
+        if protected:
+            raise HTTPException(status_code=400, detail=f"Cannot update alert rule fields: {', '.join(protected)}")
+
+        rule = self._rules_by_id.get(rule_id)
+        if not rule:
+            raise HTTPException(status_code=404, detail=f"Alert rule with ID '{rule_id}' not found")
+            
+        # Update the rule
+        for key, value in updates.items():
+            if hasattr(rule, key):
+                setattr(rule, key, value)
+        
+        # Re-bind derived fields (comparison operator, log method)
+        rule.__post_init__()
+        self._active_rules = None
                 
-        raise HTTPException(status_code=404, detail=f"Alert rule with ID '{rule_id}' not found")
+        # Log the update
+        logger.info(f"Alert rule {rule_id} updated: {updates}")
+        
+        return rule
     
     async def add_alert_rule(self, rule: AlertRule) -> AlertRule:
         """Add a new alert rule."""
         # Check for duplicate ID
-        for existing_rule in self.rules:
-            if existing_rule.id == rule.id:
-                raise HTTPException(status_code=400, detail=f"Alert rule with ID '{rule.id}' already exists")
+        if rule.id in self._rules_by_id:
+            raise HTTPException(status_code=400, detail=f"Alert rule with ID '{rule.id}' already exists")
                 
         # Add the rule
-        self.rules.append(rule)
+        self._rules_by_id[rule.id] = rule
+        self._active_rules = None
         
         # Log the addition
         logger.info(f"New alert rule added: {rule.id} - {rule.name}")
@@ -442,17 +535,15 @@ class AlertingService:
     
     async def delete_alert_rule(self, rule_id: str) -> bool:
         """Delete an alert rule."""
-        for i, rule in enumerate(self.rules):
-            if rule.id == rule_id:
-                # Remove the rule
-                self.rules.pop(i)
-                
-                # Log the deletion
-                logger.info(f"Alert rule {rule_id} deleted")
+        # Remove the rule
+        if self._rules_by_id.pop(rule_id, None) is None:
+            raise HTTPException(status_code=404, detail=f"Alert rule with ID '{rule_id}' not found")
+        self._active_rules = None
                 
-                return True
-                
-        raise HTTPException(status_code=404, detail=f"Alert rule with ID '{rule_id}' not found")
+        # Log the deletion
+        logger.info(f"Alert rule {rule_id} deleted")
+        
+        return True
 
 
 # Create a global instance
@@ -7,8 +7,11 @@ Supabase JWT tokens.
 
 import os
 import logging
+import time
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Tuple
+
 import jwt
-from typing import Optional, Dict, Any
 from fastapi import Request, HTTPException, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 
@@ -16,6 +19,12 @@ logger = logging.getLogger(__name__)
 
 security = HTTPBearer()
 
+# Supabase signs access tokens with HS256
+JWT_ALGORITHMS = ["HS256"]
+
+# Maximum number of verified tokens to keep in memory
+TOKEN_CACHE_SIZE = 1024
+
 
 class AuthService:
     """Service for authenticating API requests"""
@@ -26,6 +35,12 @@ class AuthService:
         if not self.jwt_secret:
             logger.warning("Supabase JWT secret not found in environment variables")
         
+        # Encode the secret once rather than on every decode
+        self._jwt_key = self.jwt_secret.encode("utf-8") if self.jwt_secret else None
+        
+        # LRU cache of verified tokens: token -> (expiry timestamp, payload)
+        self._token_cache: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        
     def verify_token(self, token: str) -> Optional[Dict[str, Any]]:
         """
         Verify a JWT token and return the decoded payload
@@ -39,16 +54,31 @@ class AuthService:
         if not self.jwt_secret:
             logger.warning("Cannot verify token: JWT secret not configured")
             return None
+        
+        # Reuse the payload if this token was already verified and hasn't expired
+        cached = self._token_cache.get(token)
+        if cached is not None:
+            expires_at, payload = cached
+            if expires_at > time.time():
+                self._token_cache.move_to_end(token)
+                return payload
+            del self._token_cache[token]
             
         try:
             # Decode and verify the token
             payload = jwt.decode(
                 token,
-                self.jwt_secret,
-                algorithms=["HS256"],
+                self._jwt_key,
+                algorithms=JWT_ALGORITHMS,
                 options={"verify_signature": True}
             )
             
+            # Only tokens with an expiry can be cached safely
+            if "exp" in payload:
+                self._token_cache[token] = (float(payload["exp"]), payload)
+                if len(self._token_cache) > TOKEN_CACHE_SIZE:
+                    self._token_cache.popitem(last=False)
+            
             return payload
         except jwt.InvalidTokenError as e:
             logger.warning(f"Invalid token: {e}")
@@ -77,14 +107,18 @@ class AuthService:
 
 # Dependency for protected routes
 async def get_current_user(
+    request: Request,
     credentials: HTTPAuthorizationCredentials = Depends(security)
 ) -> Dict[str, Any]:
     """
     Get the current authenticated user from JWT token
     
     This function is used as a FastAPI dependency to protect routes.
+    The result is stored on request.state.user so later consumers in the
+    same request reuse it instead of verifying the token again.
     
     Args:
+        request: The incoming request
         credentials: The HTTP Authorization credentials
         
     Returns:
@@ -93,6 +127,10 @@ async def get_current_user(
     Raises:
         HTTPException: If the token is invalid or authentication fails
     """
+    user = getattr(request.state, "user", None)
+    if user is not None:
+        return user
+    
     token = credentials.credentials
     payload = auth_service.verify_token(token)
     
@@ -113,11 +151,12 @@ async def get_current_user(
         )
         
     # Return user information
-    return {
+    request.state.user = {
         "user_id": user_id,
         "email": payload.get("email", ""),
         "role": payload.get("role", "user")
     }
+    return request.state.user
 
 
 # Create a singleton instance
@@ -3,17 +3,23 @@ Cost monitoring service for the Interview Evaluator application.
 Tracks LLM API usage, costs, and provides forecasting.
 """
 
+import asyncio
+import calendar
 import logging
 import os
-from datetime import datetime, timedelta
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from functools import lru_cache
 from typing import Dict, List, Optional, Any
 
 import httpx
 from fastapi import HTTPException
-from pydantic import BaseModel
 
-from app.services.langsmith.client import langsmith_service
-from app.services.monitoring import get_monitoring_service
+from app.services.langsmith.client import get_langsmith_service
+from app.services.monitoring import MonitoringService, get_monitoring_service
+from app.services.supabase_client import get_supabase_client
 
 # Configure logger
 logger = logging.getLogger(__name__)
@@ -46,17 +52,48 @@ MODEL_COSTS = {
     }
 }
 
+# (input, output) price per token, flattened from MODEL_COSTS for the sync loop
+MODEL_PRICES = {model: (costs["input"], costs["output"]) for model, costs in MODEL_COSTS.items()}
+DEFAULT_PRICES = MODEL_PRICES["default"]
+
+# Costs are tracked internally as integer micro-dollars so repeated sums are exact
+MICRO_USD = 1_000_000
+
 # LLM cost budget threshold (default)
 DEFAULT_BUDGET_THRESHOLD = 100.0  # USD
 
+# How long synced cost data is reused before pulling from LangSmith again (seconds)
+DEFAULT_SYNC_TTL_SECONDS = 60
+
+# Sync windows are split into ranges of this many days, fetched concurrently
+SYNC_CHUNK_DAYS = 3
+# Maximum number of concurrent LangSmith range requests
+MAX_CONCURRENT_RUN_FETCHES = 8
+
 
-class DailyCostRecord(BaseModel):
+# Daily cost records are internal aggregates that are updated in place on
+# every sync, so they are a slotted dataclass rather than a Pydantic model.
+@dataclass
+class DailyCostRecord:
     """Model for a daily cost record."""
+    __slots__ = ("date", "input_tokens", "output_tokens", "cost_micro_usd", "model_breakdown")
+    
     date: datetime
     input_tokens: int
     output_tokens: int
-    cost: float
-    model_breakdown: Dict[str, float]
+    cost_micro_usd: int
+    # Cost per model in micro-dollars
+    model_breakdown: Dict[str, int]
+
+
+def _to_usd(micro_usd: int) -> float:
+    """Convert integer micro-dollars to dollars."""
+    return micro_usd / MICRO_USD
+
+
+def _to_micro_usd(usd: float) -> int:
+    """Convert dollars to integer micro-dollars."""
+    return round(usd * MICRO_USD)
 
 
 class CostMonitoringService:
@@ -64,112 +101,212 @@ class CostMonitoringService:
 
     def __init__(self):
         """Initialize the cost monitoring service."""
-        self.daily_costs: List[DailyCostRecord] = []
+        # Daily cost records keyed by ISO date (YYYY-MM-DD)
+        self.daily_costs: Dict[str, DailyCostRecord] = {}
         self.budget_threshold = float(os.getenv("LLM_BUDGET_THRESHOLD", DEFAULT_BUDGET_THRESHOLD))
         self.alert_threshold_percentage = 0.8  # Alert at 80% of budget
         self.last_sync = None
-        
+        # Monotonic clock reading of the last sync, used only for TTL gating
+        self._last_sync_monotonic: Optional[float] = None
+        self._sync_ttl_seconds = int(os.getenv("COST_SYNC_TTL", DEFAULT_SYNC_TTL_SECONDS))
+        # Created on first use so it binds to the running event loop
+        self._sync_lock: Optional[asyncio.Lock] = None
+        # Monthly aggregates keyed by month start date, cleared when records change
+        self._monthly_totals: Dict[str, Dict[str, Any]] = {}
+        # Whether persisted records have been loaded from Supabase
+        self._loaded = False
+        # Day each budget alert level was last raised, to alert at most once a day per level
+        self._last_alert_day: Dict[str, date] = {}
+        self._monitoring: Optional[MonitoringService] = None
+    
+    @property
+    def monitoring(self) -> MonitoringService:
+        """The monitoring service, looked up once on first use."""
+        if self._monitoring is None:
+            self._monitoring = get_monitoring_service()
+        return self._monitoring
+        
+    def _sync_is_fresh(self) -> bool:
+        """Check whether the last sync is recent enough to skip another one."""
+        return (
+            self._last_sync_monotonic is not None
+            and time.monotonic() - self._last_sync_monotonic < self._sync_ttl_seconds
+        )
+    
     async def sync_with_langsmith(self):
-        """Sync cost data with LangSmith."""
+        """Sync cost data with LangSmith, at most once per TTL window."""
+        if self._sync_is_fresh():
+            return
+        
+        if self._sync_lock is None:
+            self._sync_lock = asyncio.Lock()
+        
+        # Concurrent callers wait for the in-flight sync instead of issuing
+        # their own LangSmith requests
+        async with self._sync_lock:
+            if self._sync_is_fresh():
+                return
+            await self._sync_with_langsmith()
+    
+    async def _load_persisted_costs(self) -> bool:
+        """Load persisted daily costs so a restart only syncs the window since the last sync.
+        
+        Returns False if the records could not be loaded.
+        """
+        supabase = get_supabase_client()
+        rows = await asyncio.to_thread(supabase.get_daily_costs)
+        
+        if rows is None:
+            return False
+        self._loaded = True
+        
+        for row in rows:
+            date_str = row["date"]
+            self.daily_costs[date_str] = DailyCostRecord(
+                date=datetime.fromisoformat(date_str),
+                input_tokens=row["input_tokens"],
+                output_tokens=row["output_tokens"],
+                cost_micro_usd=_to_micro_usd(row["cost"]),
+                model_breakdown={
+                    model: _to_micro_usd(cost)
+                    for model, cost in (row.get("model_breakdown") or {}).items()
+                }
+            )
+            synced_at = datetime.fromisoformat(row["synced_at"])
+            if self.last_sync is None or synced_at > self.last_sync:
+                self.last_sync = synced_at
+        
+        if rows:
+            self._monthly_totals.clear()
+            logger.info(f"Loaded {len(rows)} persisted daily cost records (last sync: {self.last_sync})")
+        return True
+    
+    async def _persist_costs(self, date_strs: List[str], synced_at: datetime):
+        """Persist the daily cost records for the given dates."""
+        records = []
+        for date_str in date_strs:
+            record = self.daily_costs[date_str]
+            records.append({
+                "date": date_str,
+                "input_tokens": record.input_tokens,
+                "output_tokens": record.output_tokens,
+                "cost": _to_usd(record.cost_micro_usd),
+                "model_breakdown": {model: _to_usd(cost) for model, cost in record.model_breakdown.items()},
+                "synced_at": synced_at.isoformat()
+            })
+        
+        supabase = get_supabase_client()
+        await asyncio.to_thread(supabase.upsert_daily_costs, records)
+    
+    async def _sync_with_langsmith(self):
+        """Pull new runs from LangSmith and fold them into the daily cost records."""
         try:
             # Get LangSmith client
-            if not langsmith_service or not langsmith_service.is_configured():
+            if not get_langsmith_service().is_configured():
                 logger.warning("LangSmith client not available for cost monitoring")
                 return
             
+            # A failed load is not an empty history: skip this sync rather than
+            # resyncing the full window, and retry the load on the next one
+            if not self._loaded and not await self._load_persisted_costs():
+                logger.error("Failed to load persisted daily costs, skipping cost sync")
+                return
+            
             # Set the sync window
+            end_time = datetime.now()
+            end_monotonic = time.monotonic()
             if self.last_sync:
                 start_time = self.last_sync
             else:
                 # Start from 30 days ago if no previous sync
-                start_time = datetime.now() - timedelta(days=30)
-                
-            end_time = datetime.now()
+                start_time = end_time - timedelta(days=30)
             
             # Get run data from LangSmith
-            runs = await langsmith_service.list_runs(
-                start_time=start_time.isoformat(),
-                end_time=end_time.isoformat()
-            )
+            runs = await self._fetch_runs(start_time, end_time)
             
             if not runs:
                 logger.info("No new runs found in LangSmith")
                 self.last_sync = end_time
+                self._last_sync_monotonic = end_monotonic
                 return
             
-            # Group runs by date and model
-            daily_stats = {}
+            # Sum tokens per (date, model) first: cost is linear in tokens, so
+            # pricing each group once avoids a price lookup and multiply per run
+            token_totals = defaultdict(lambda: [0, 0])
             
             for run in runs:
-                # Skip runs with no token info
+                # Skip runs with no token or start time info
                 if "input_tokens" not in run or "output_tokens" not in run:
                     continue
+                run_start = run.get("start_time")
+                if not run_start:
+                    continue
                 
-                # Extract date and model info
-                run_datetime = datetime.fromisoformat(run.get("start_time"))
-                run_date = run_datetime.date().isoformat()
+                # Extract date and model info (ISO timestamps start with YYYY-MM-DD)
+                run_date = run_start[:10]
                 model = run.get("extra", {}).get("model_name", "default")
                 
-                # Initialize date entry if not exists
-                if run_date not in daily_stats:
-                    daily_stats[run_date] = {
-                        "total_input_tokens": 0,
-                        "total_output_tokens": 0,
-                        "total_cost": 0.0,
-                        "model_breakdown": {}
-                    }
-                
                 # Add token counts
-                input_tokens = run.get("input_tokens", 0)
-                output_tokens = run.get("output_tokens", 0)
-                
-                daily_stats[run_date]["total_input_tokens"] += input_tokens
-                daily_stats[run_date]["total_output_tokens"] += output_tokens
-                
-                # Calculate cost for this run
-                model_cost = MODEL_COSTS.get(model, MODEL_COSTS["default"])
-                run_cost = (input_tokens * model_cost["input"]) + (output_tokens * model_cost["output"])
-                
-                daily_stats[run_date]["total_cost"] += run_cost
+                totals = token_totals[(run_date, model)]
+                totals[0] += run["input_tokens"]
+                totals[1] += run["output_tokens"]
+            
+            # Group costs by date and model
+            daily_stats = defaultdict(lambda: {
+                "total_input_tokens": 0,
+                "total_output_tokens": 0,
+                "total_cost": 0,
+                "model_breakdown": {}
+            })
+            
+            for (run_date, model), (input_tokens, output_tokens) in token_totals.items():
+                stats = daily_stats[run_date]
+                stats["total_input_tokens"] += input_tokens
+                stats["total_output_tokens"] += output_tokens
                 
-                # Add to model breakdown
-                if model not in daily_stats[run_date]["model_breakdown"]:
-                    daily_stats[run_date]["model_breakdown"][model] = 0.0
+                # Calculate cost for this model's runs on this date
+                input_price, output_price = MODEL_PRICES.get(model, DEFAULT_PRICES)
+                group_cost = _to_micro_usd((input_tokens * input_price) + (output_tokens * output_price))
                 
-                daily_stats[run_date]["model_breakdown"][model] += run_cost
+                stats["total_cost"] += group_cost
+                stats["model_breakdown"][model] = group_cost
             
             # Update daily costs
+            self._monthly_totals.clear()
             for date_str, stats in daily_stats.items():
                 date = datetime.fromisoformat(date_str)
                 
                 # Check if we already have a record for this date
-                existing_record = next((r for r in self.daily_costs if r.date.date().isoformat() == date_str), None)
+                existing_record = self.daily_costs.get(date_str)
                 
                 if existing_record:
                     # Update existing record
                     existing_record.input_tokens += stats["total_input_tokens"]
                     existing_record.output_tokens += stats["total_output_tokens"]
-                    existing_record.cost += stats["total_cost"]
+                    existing_record.cost_micro_usd += stats["total_cost"]
                     
                     # Update model breakdown
+                    model_breakdown = existing_record.model_breakdown
                     for model, cost in stats["model_breakdown"].items():
-                        if model in existing_record.model_breakdown:
-                            existing_record.model_breakdown[model] += cost
-                        else:
-                            existing_record.model_breakdown[model] = cost
+                        model_breakdown[model] = model_breakdown.get(model, 0) + cost
                 else:
                     # Create new record
                     record = DailyCostRecord(
                         date=date,
                         input_tokens=stats["total_input_tokens"],
                         output_tokens=stats["total_output_tokens"],
-                        cost=stats["total_cost"],
+                        cost_micro_usd=stats["total_cost"],
                         model_breakdown=stats["model_breakdown"]
                     )
-                    self.daily_costs.append(record)
+                    self.daily_costs[date_str] = record
             
             # Update last sync time
             self.last_sync = end_time
+            self._last_sync_monotonic = end_monotonic
+            
+            # Persist updated records so a restart doesn't resync the full window
+            if daily_stats:
+                await self._persist_costs(list(daily_stats), end_time)
             
             # Check if we're approaching budget threshold
             await self.check_budget_threshold()
@@ -183,61 +320,137 @@ class CostMonitoringService:
             logger.error(f"Error syncing cost data from LangSmith: {str(e)}")
             raise
     
+    def _aggregate_month(self, month_start: datetime) -> Dict[str, Any]:
+        """Aggregate cost, tokens and model breakdown since month_start in a single pass."""
+        # ISO date keys compare in date order
+        month_start_key = month_start.date().isoformat()
+        
+        cached = self._monthly_totals.get(month_start_key)
+        if cached is not None:
+            return cached
+        
+        record_count = 0
+        cost = 0
+        input_tokens = 0
+        output_tokens = 0
+        model_breakdown: Dict[str, int] = {}
+        
+        for date_str, record in self.daily_costs.items():
+            if date_str < month_start_key:
+                continue
+            record_count += 1
+            cost += record.cost_micro_usd
+            input_tokens += record.input_tokens
+            output_tokens += record.output_tokens
+            for model, model_cost in record.model_breakdown.items():
+                model_breakdown[model] = model_breakdown.get(model, 0) + model_cost
+        
+        totals = {
+            "record_count": record_count,
+            "cost": _to_usd(cost),
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "model_breakdown": {model: _to_usd(model_cost) for model, model_cost in model_breakdown.items()}
+        }
+        self._monthly_totals[month_start_key] = totals
+        return totals
+    
+    async def _fetch_runs(self, start_time: datetime, end_time: datetime) -> List[Dict[str, Any]]:
+        """Fetch runs in fixed-width time ranges concurrently, retrying failed ranges once.
+        
+        Raises if a range still fails, so the sync does not advance past runs it missed.
+        """
+        ranges = []
+        range_start = start_time
+        while range_start < end_time:
+            range_end = min(range_start + timedelta(days=SYNC_CHUNK_DAYS), end_time)
+            ranges.append((range_start, range_end))
+            range_start = range_end
+        
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_RUN_FETCHES)
+        langsmith_service = get_langsmith_service()
+        
+        async def fetch_range(range_start: datetime, range_end: datetime) -> List[Dict[str, Any]]:
+            async with semaphore:
+                # Every run in the range is needed, and mock data must never be counted
+                return await langsmith_service.list_runs(
+                    limit=None,
+                    start_time=range_start.isoformat(),
+                    end_time=range_end.isoformat(),
+                    strict=True
+                )
+        
+        results = await asyncio.gather(
+            *(fetch_range(a, b) for a, b in ranges),
+            return_exceptions=True
+        )
+        
+        runs = []
+        for (range_start, range_end), result in zip(ranges, results):
+            if isinstance(result, BaseException):
+                logger.warning(f"Retrying LangSmith runs for {range_start.isoformat()} - {range_end.isoformat()}: {result}")
+                result = await fetch_range(range_start, range_end)
+            if result:
+                runs.extend(result)
+        
+        return runs
+    
     async def check_budget_threshold(self):
         """Check if we're approaching the budget threshold."""
-        # Calculate current month's total
         today = datetime.now()
-        month_start = datetime(today.year, today.month, 1)
-        current_month_costs = [
-            record for record in self.daily_costs 
-            if record.date >= month_start
-        ]
         
-        if not current_month_costs:
+        # Nothing to check without a budget, or once the highest level was raised today
+        if not self.budget_threshold or self._last_alert_day.get("ERROR") == today.date():
+            return
+        
+        # Calculate current month's total
+        totals = self._aggregate_month(datetime(today.year, today.month, 1))
+        
+        if not totals["record_count"]:
             return
         
-        # Calculate total cost for current month
-        monthly_cost = sum(record.cost for record in current_month_costs)
+        monthly_cost = totals["cost"]
         
         # Check if we're approaching the threshold
-        if monthly_cost >= (self.budget_threshold * self.alert_threshold_percentage):
-            logger.warning(f"Approaching LLM budget threshold: ${monthly_cost:.2f} / ${self.budget_threshold:.2f}")
-            
-            # Create alert
-            monitoring_service = get_monitoring_service()
-            await monitoring_service.create_alert(
-                level="WARNING" if monthly_cost < self.budget_threshold else "ERROR",
-                message=f"LLM cost warning: Monthly spending of ${monthly_cost:.2f} is {(monthly_cost / self.budget_threshold) * 100:.1f}% of budget (${self.budget_threshold:.2f})",
-                source="cost_monitoring"
-            )
+        if monthly_cost < (self.budget_threshold * self.alert_threshold_percentage):
+            return
+        
+        level = "WARNING" if monthly_cost < self.budget_threshold else "ERROR"
+        if self._last_alert_day.get(level) == today.date():
+            return
+        self._last_alert_day[level] = today.date()
+        
+        logger.warning(f"Approaching LLM budget threshold: ${monthly_cost:.2f} / ${self.budget_threshold:.2f}")
+        
+        # Create alert
+        await self.monitoring.create_alert(
+            level=level,
+            message=f"LLM cost warning: Monthly spending of ${monthly_cost:.2f} is {(monthly_cost / self.budget_threshold) * 100:.1f}% of budget (${self.budget_threshold:.2f})",
+            source="cost_monitoring"
+        )
     
     async def update_monitoring_metrics(self):
         """Update monitoring metrics with cost data."""
-        monitoring_service = get_monitoring_service()
-        
-        # Calculate current month's total
+        # Calculate current month's totals
         today = datetime.now()
-        month_start = datetime(today.year, today.month, 1)
-        current_month_costs = [
-            record for record in self.daily_costs 
-            if record.date >= month_start
-        ]
+        totals = self._aggregate_month(datetime(today.year, today.month, 1))
         
-        if not current_month_costs:
+        if not totals["record_count"]:
             return
         
-        # Calculate totals
-        monthly_cost = sum(record.cost for record in current_month_costs)
-        monthly_input_tokens = sum(record.input_tokens for record in current_month_costs)
-        monthly_output_tokens = sum(record.output_tokens for record in current_month_costs)
+        monthly_cost = totals["cost"]
+        monthly_input_tokens = totals["input_tokens"]
+        monthly_output_tokens = totals["output_tokens"]
         total_tokens = monthly_input_tokens + monthly_output_tokens
         
-        # Update metrics
-        await monitoring_service.record_metric("llm_monthly_cost", monthly_cost)
-        await monitoring_service.record_metric("llm_monthly_tokens", total_tokens)
-        await monitoring_service.record_metric("llm_monthly_input_tokens", monthly_input_tokens)
-        await monitoring_service.record_metric("llm_monthly_output_tokens", monthly_output_tokens)
-        await monitoring_service.record_metric("llm_budget_percentage", (monthly_cost / self.budget_threshold) * 100)
+        # Update metrics in one batch
+        await self.monitoring.record_metrics({
+            "llm_monthly_cost": monthly_cost,
+            "llm_monthly_tokens": total_tokens,
+            "llm_monthly_input_tokens": monthly_input_tokens,
+            "llm_monthly_output_tokens": monthly_output_tokens,
+            "llm_budget_percentage": (monthly_cost / self.budget_threshold) * 100
+        })
     
     async def get_daily_costs(self, days: int = 30) -> List[Dict[str, Any]]:
         """Get daily costs for the specified number of days."""
@@ -250,7 +463,7 @@ class CostMonitoringService:
         
         # Filter records by date
         filtered_records = [
-            record for record in self.daily_costs 
+            record for record in self.daily_costs.values()
             if record.date >= start_date and record.date <= end_date
         ]
         
@@ -264,8 +477,8 @@ class CostMonitoringService:
                 "input_tokens": record.input_tokens,
                 "output_tokens": record.output_tokens,
                 "total_tokens": record.input_tokens + record.output_tokens,
-                "cost": record.cost,
-                "model_breakdown": record.model_breakdown
+                "cost": _to_usd(record.cost_micro_usd),
+                "model_breakdown": {model: _to_usd(cost) for model, cost in record.model_breakdown.items()}
             }
             for record in filtered_records
         ]
@@ -281,36 +494,22 @@ class CostMonitoringService:
         today = datetime.now()
         month_start = datetime(today.year, today.month, 1)
         
-        # Filter records for current month
-        current_month_costs = [
-            record for record in self.daily_costs 
-            if record.date >= month_start
-        ]
-        
-        # Calculate totals
-        monthly_cost = sum(record.cost for record in current_month_costs)
-        monthly_input_tokens = sum(record.input_tokens for record in current_month_costs)
-        monthly_output_tokens = sum(record.output_tokens for record in current_month_costs)
+        # Calculate totals and model breakdown for current month
+        totals = self._aggregate_month(month_start)
+        monthly_cost = totals["cost"]
+        monthly_input_tokens = totals["input_tokens"]
+        monthly_output_tokens = totals["output_tokens"]
         total_tokens = monthly_input_tokens + monthly_output_tokens
-        
-        # Calculate model breakdown
-        model_breakdown = {}
-        for record in current_month_costs:
-            for model, cost in record.model_breakdown.items():
-                if model in model_breakdown:
-                    model_breakdown[model] += cost
-                else:
-                    model_breakdown[model] = cost
+        # Copy so callers can't mutate the cached aggregate
+        model_breakdown = dict(totals["model_breakdown"])
         
         # Calculate daily average
         days_elapsed = (today - month_start).days + 1
         daily_average_cost = monthly_cost / days_elapsed if days_elapsed > 0 else 0
         
         # Project remainder of month
-        days_remaining = (
-            (month_start.replace(month=month_start.month % 12 + 1, day=1) if month_start.month < 12 
-             else month_start.replace(year=month_start.year + 1, month=1, day=1)) - today
-        ).days
+        days_in_month = calendar.monthrange(today.year, today.month)[1]
+        days_remaining = days_in_month - today.day
         projected_additional_cost = daily_average_cost * days_remaining
         projected_total_cost = monthly_cost + projected_additional_cost
         
@@ -362,7 +561,7 @@ class CostMonitoringService:
         last_7_days = today - timedelta(days=7)
         
         recent_records = [
-            record for record in self.daily_costs 
+            record for record in self.daily_costs.values()
             if record.date >= last_7_days
         ]
         
@@ -377,7 +576,7 @@ class CostMonitoringService:
             }
         
         # Calculate totals for recent period
-        recent_cost = sum(record.cost for record in recent_records)
+        recent_cost = _to_usd(sum(record.cost_micro_usd for record in recent_records))
         recent_tokens = sum(record.input_tokens + record.output_tokens for record in recent_records)
         
         # Calculate daily averages
@@ -402,12 +601,7 @@ class CostMonitoringService:
         }
 
 
-# Create a global instance
-cost_monitoring_service = None
-
+@lru_cache(maxsize=1)
 def get_cost_monitoring_service() -> CostMonitoringService:
     """Get or create the cost monitoring service singleton."""
-    global cost_monitoring_service
-    if cost_monitoring_service is None:
-        cost_monitoring_service = CostMonitoringService()
-    return cost_monitoring_service
\ No newline at end of file
+    return CostMonitoringService()
\ No newline at end of file
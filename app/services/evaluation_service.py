@@ -15,7 +15,7 @@ from app.agents.evaluator import (
     InterviewEvaluationState, 
     EvaluationStatus
 )
-from app.services.langsmith import langsmith_service
+from app.services.langsmith import get_langsmith_service
 
 logger = logging.getLogger(__name__)
 
@@ -39,16 +39,6 @@ async def evaluate_interview(
     try:
         logger.info(f"Starting evaluation for interview {interview_id}")
         
-        # Create a trace for the entire evaluation process
-        trace_id = langsmith_service.trace_run(
-            name="evaluate_interview",
-            inputs={
-                "interview_id": interview_id,
-                "candidate_name": candidate_name,
-                "transcript_path": transcript_path
-            }
-        )
-        
         # If no transcript path is provided, use a default from our example content
         if not transcript_path:
             transcript_path = "interview-content/sample.txt"
@@ -61,6 +51,16 @@ async def evaluate_interview(
             status=EvaluationStatus.NOT_STARTED
         )
         
+        # Create a trace for the entire evaluation process
+        await get_langsmith_service().trace_run(
+            name="evaluate_interview",
+            inputs={
+                "interview_id": interview_id,
+                "candidate_name": candidate_name,
+                "transcript_path": transcript_path
+            }
+        )
+        
         # Invoke the agent
         try:
             result = await evaluator_agent.ainvoke(initial_state)
@@ -87,17 +87,17 @@ async def evaluate_interview(
                     "summary": result.summary.summary,
                     "strengths": result.summary.strengths,
                     "weaknesses": result.summary.weaknesses,
-                    "criteria_evaluations": []
+                    # Individual criteria evaluations
+                    "criteria_evaluations": [
+                        {
+                            "criterion": ev.criterion_name,
+                            "score": ev.score,
+                            "justification": ev.justification,
+                            "supporting_quotes": ev.supporting_quotes
+                        }
+                        for ev in result.evaluations
+                    ]
                 }
-                
-                # Add individual criteria evaluations
-                for eval in result.evaluations:
-                    response["criteria_evaluations"].append({
-                        "criterion": eval.criterion_name,
-                        "score": eval.score,
-                        "justification": eval.justification,
-                        "supporting_quotes": eval.supporting_quotes
-                    })
                     
                 return response
             else:
@@ -5,6 +5,6 @@ This package provides integration with LangSmith for tracing,
 monitoring, and evaluation of LangGraph agents.
 """
 
-from app.services.langsmith.client import langsmith_service
+from app.services.langsmith.client import get_langsmith_service
 
-__all__ = ['langsmith_service']
\ No newline at end of file
+__all__ = ['get_langsmith_service']
\ No newline at end of file
@@ -3,13 +3,21 @@ LangSmith integration service for interacting with LangSmith platform.
 Falls back to a mock implementation if LangSmith is not available.
 """
 
+import asyncio
+import functools
+import itertools
 import logging
 import os
-import httpx
-from typing import Any, Dict, List, Optional
+import time
+import uuid
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple, Union
 
 # Try to import LangSmith, but don't fail if it's not available
 try:
+    import requests
     from langsmith import Client
     from langsmith.run_helpers import traceable
     LANGSMITH_AVAILABLE = True
@@ -18,6 +26,37 @@ except ImportError:
     
 logger = logging.getLogger(__name__)
 
+# Pending run writes beyond this are dropped rather than blocking callers
+TRACE_QUEUE_MAXSIZE = 1024
+# Maximum number of run writes sent per flush
+TRACE_FLUSH_BATCH_SIZE = 50
+# How long the flusher waits to fill a batch (seconds)
+TRACE_FLUSH_INTERVAL_SECONDS = 1.0
+# Worker threads for blocking SDK calls; also caps concurrent LangSmith requests
+SDK_MAX_WORKERS = 8
+# Fields returned as-is for each listed run
+_RUN_FIELDS = ("id", "name", "start_time", "end_time", "status", "error")
+# Fields requested from LangSmith: token counts and extra feed the cost and usage
+# metrics, and the SDK's Run model also requires run_type and trace_id
+_RUN_SELECT = _RUN_FIELDS + ("prompt_tokens", "completion_tokens", "extra", "run_type", "trace_id")
+# Runs pulled from the SDK iterator per worker-thread hop
+RUN_PAGE_SIZE = 100
+
+# Mock IDs are a per-process prefix plus a counter, unique within the process
+_MOCK_PREFIX = uuid.uuid4().hex[:8]
+_mock_counter = itertools.count()
+
+# Consecutive SDK failures after which calls go straight to mock data
+CIRCUIT_FAILURE_THRESHOLD = 5
+# How long the SDK is skipped once that threshold is reached (seconds)
+CIRCUIT_COOLDOWN_SECONDS = 30.0
+
+# Callback handlers cached per (run_name, tags) before the oldest is evicted
+MAX_CACHED_HANDLERS = 128
+
+# Runs whose dotted order is remembered so later updates can be batch-ingested
+MAX_TRACKED_RUNS = 10_000
+
 # Create a handler for LangSmith callbacks
 class LangSmithCallbackHandler:
     """Callback handler for LangSmith tracing."""
@@ -26,67 +65,200 @@ class LangSmithCallbackHandler:
         """Initialize the callback handler."""
         self.initialized = False
         self.project_name = project_name
-        self.tags = tags or []
+        # Handlers are shared between callers, so tags are kept immutable
+        self.tags = tuple(tags) if tags else ()
         self.run_name = run_name
         self.client = client
         
         if LANGSMITH_AVAILABLE and client:
             self.initialized = True
-            logger.info(f"Created LangSmith callback handler for project: {project_name}")
+            logger.info("Created LangSmith callback handler for project: %s", project_name)
         else:
-            logger.info(f"[MOCK] Created LangSmith callback handler for project: {project_name}")
+            logger.info("[MOCK] Created LangSmith callback handler for project: %s", project_name)
 
 class LangSmithService:
     """Service for interacting with LangSmith platform."""
     
     def __init__(self):
-        """Initialize the LangSmith client."""
+        """Read LangSmith settings; the SDK client is created by startup()."""
         self.client = None
         self.initialized = False
+        # Whether calls go to the real SDK, checked on every trace/update call
+        self._live = False
         self.project_name = os.environ.get("LANGSMITH_PROJECT", "interview-evaluator")
         self.api_key = os.environ.get("LANGSMITH_API_KEY")
         self.api_url = os.environ.get("LANGSMITH_ENDPOINT", "https://api.smith.langchain.com")
-        
-        # Try to initialize a real client if LangSmith is available
-        if LANGSMITH_AVAILABLE and self.api_key:
-            try:
-                self.client = Client(
-                    api_url=self.api_url,
-                    api_key=self.api_key
-                )
-                self.initialized = True
-                logger.info(f"LangSmith client initialized for project: {self.project_name}")
-            except Exception as e:
-                logger.warning(f"Failed to initialize LangSmith client: {e}")
-                self.initialized = False
-        else:
-            logger.info(f"[MOCK] Using mock LangSmith client for project: {self.project_name}")
+        # One HTTP session shared by every client this service creates, so
+        # keep-alive connections survive re-initialization
+        self._session = None
+        # Run writes are queued and sent by a background flusher so callers
+        # never wait on LangSmith; both are created on first use in the running loop
+        self._queue: Optional[asyncio.Queue] = None
+        self._flusher_task: Optional[asyncio.Task] = None
+        # The SDK is synchronous, so its calls run on this pool instead of the event loop
+        self._sdk_pool: Optional[ThreadPoolExecutor] = None
+        # Batch ingestion needs each run's dotted order on updates too, so it is
+        # kept from creation until the run is updated (oldest evicted first)
+        self._run_orders: "OrderedDict[str, str]" = OrderedDict()
+        # Handlers only depend on the client, project, run name and tags, so
+        # they are reused until the client changes
+        self._handler_cache: "OrderedDict[Tuple, LangSmithCallbackHandler]" = OrderedDict()
+        # Circuit breaker state, so an unavailable LangSmith doesn't add a full
+        # timeout to every call
+        self._failures = 0
+        self._open_until = 0.0
+    
+    async def startup(self) -> None:
+        """Create the SDK client off the event loop; called once at application startup."""
+        if self.client is None:
+            await self._run_sdk(self.initialize)
     
     def initialize(self) -> None:
         """Initialize or re-initialize the LangSmith client."""
         if not LANGSMITH_AVAILABLE or not self.api_key:
-            logger.warning("LangSmith not available or API key not provided")
+            logger.info("[MOCK] Using mock LangSmith client for project: %s", self.project_name)
             return
             
         try:
-            self.client = Client(
-                api_url=self.api_url,
-                api_key=self.api_key
-            )
+            self.client = self._create_client()
             self.initialized = True
-            logger.info("LangSmith client re-initialized")
+            logger.info("LangSmith client initialized for project: %s", self.project_name)
         except Exception as e:
-            logger.error(f"Failed to re-initialize LangSmith client: {e}")
+            logger.error("Failed to initialize LangSmith client: %s", e, exc_info=True)
             self.initialized = False
+        self._live = self.initialized and self.client is not None
+        self._handler_cache.clear()
+    
+    def _create_client(self) -> "Client":
+        """Create an SDK client on the shared pooled HTTP session."""
+        if self._session is None:
+            self._session = requests.Session()
+        return Client(
+            api_url=self.api_url,
+            api_key=self.api_key,
+            session=self._session
+        )
     
     def is_configured(self) -> bool:
         """Check if LangSmith is configured and connected."""
-        return self.initialized
+        return self._live
+    
+    async def _run_sdk(self, func, *args, **kwargs):
+        """Run a blocking SDK call on the SDK thread pool."""
+        if self._sdk_pool is None:
+            self._sdk_pool = ThreadPoolExecutor(max_workers=SDK_MAX_WORKERS, thread_name_prefix="langsmith")
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._sdk_pool, functools.partial(func, *args, **kwargs))
+    
+    def close(self) -> None:
+        """Flush pending traces and release the SDK's pooled HTTP connections."""
+        # Later calls fall back to mock behaviour instead of using a closed client
+        self._live = False
+        self._handler_cache.clear()
+        if self._sdk_pool is not None:
+            self._sdk_pool.shutdown(wait=False)
+            self._sdk_pool = None
+        if not self.client:
+            return
+        try:
+            self.client.cleanup()
+            # The pooled session is shared by every call; close it explicitly
+            # instead of leaving sockets to the interpreter exit
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+        except Exception as e:
+            logger.warning("Failed to close LangSmith client: %s", e)
+    
+    def _sdk_available(self) -> bool:
+        """Check whether calls should go to the SDK rather than straight to mock data."""
+        return self._live and time.monotonic() >= self._open_until
+    
+    def _record_success(self) -> None:
+        """Reset the circuit breaker after a successful SDK call."""
+        if self._failures >= CIRCUIT_FAILURE_THRESHOLD:
+            logger.warning("LangSmith calls succeeding again, closing circuit breaker")
+        self._failures = 0
+    
+    def _record_failure(self) -> None:
+        """Count a failed SDK call, opening the circuit breaker at the threshold."""
+        self._failures += 1
+        if self._failures >= CIRCUIT_FAILURE_THRESHOLD:
+            if self._failures == CIRCUIT_FAILURE_THRESHOLD:
+                logger.warning(
+                    "LangSmith failed %s times in a row, skipping it for %ss",
+                    self._failures, CIRCUIT_COOLDOWN_SECONDS
+                )
+            self._open_until = time.monotonic() + CIRCUIT_COOLDOWN_SECONDS
+    
+    def _enqueue(self, kind: str, params: Dict[str, Any]) -> bool:
+        """Queue a run write for the background flusher, dropping it if the queue is full."""
+        if self._flusher_task is None or self._flusher_task.get_loop() is not asyncio.get_running_loop():
+            self._queue = asyncio.Queue(maxsize=TRACE_QUEUE_MAXSIZE)
+            self._flusher_task = asyncio.create_task(self._flush_loop())
+        
+        try:
+            self._queue.put_nowait((kind, params))
+            return True
+        except asyncio.QueueFull:
+            logger.warning("LangSmith trace queue full, dropping %s event", kind)
+            return False
+    
+    async def _flush_loop(self) -> None:
+        """Send queued run writes in batches until cancelled."""
+        loop = asyncio.get_running_loop()
+        queue = self._queue
+        while True:
+            batch = [await queue.get()]
+            deadline = loop.time() + TRACE_FLUSH_INTERVAL_SECONDS
+            while len(batch) < TRACE_FLUSH_BATCH_SIZE:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            
+            try:
+                await self._send_batch(batch)
+            finally:
+                for _ in batch:
+                    queue.task_done()
+    
+    async def _send_batch(self, batch: List[Tuple[str, Dict[str, Any]]]) -> None:
+        """Send a batch of run creates and updates in a single ingest request."""
+        if not self._sdk_available():
+            logger.warning("LangSmith unavailable, dropping %s run writes", len(batch))
+            return
+        
+        create = [run for kind, run in batch if kind == "create"]
+        update = [run for kind, run in batch if kind == "update"]
+        try:
+            await self._run_sdk(self.client.batch_ingest_runs, create=create, update=update)
+            self._record_success()
+        except Exception as e:
+            self._record_failure()
+            logger.warning("Failed to send %s LangSmith run writes: %s", len(batch), e)
+    
+    async def aclose(self) -> None:
+        """Flush queued run writes, stop the flusher and close the client."""
+        if self._flusher_task is not None and self._flusher_task.get_loop() is asyncio.get_running_loop():
+            await self._queue.join()
+            self._flusher_task.cancel()
+            try:
+                await self._flusher_task
+            except asyncio.CancelledError:
+                pass
+        self._flusher_task = None
+        self._queue = None
+        self.close()
     
     def get_callback_handler(self, run_name: str = None, tags: List[str] = None):
         """
-        Create a LangSmith callback handler for tracing LLM calls.
+        Get a LangSmith callback handler for tracing LLM calls.
         Uses a real handler if LangSmith is configured, otherwise a mock.
+        Handlers are cached per run name and tags.
         
         Args:
             run_name: Optional name for the run
@@ -95,17 +267,25 @@ class LangSmithService:
         Returns:
             LangSmithCallbackHandler instance
         """
-        return LangSmithCallbackHandler(
-            project_name=self.project_name,
-            client=self.client if self.initialized else None,
-            tags=tags or [],
-            run_name=run_name
-        )
+        key = (run_name, tuple(tags) if tags else ())
+        handler = self._handler_cache.get(key)
+        if handler is None:
+            handler = LangSmithCallbackHandler(
+                project_name=self.project_name,
+                client=self.client if self._live else None,
+                tags=key[1],
+                run_name=run_name
+            )
+            self._handler_cache[key] = handler
+            if len(self._handler_cache) > MAX_CACHED_HANDLERS:
+                self._handler_cache.popitem(last=False)
+        return handler
     
     async def trace_run(self, name: str, inputs: Dict[str, Any], **kwargs) -> Optional[str]:
         """
         Create a LangSmith trace for a run.
         Uses real LangSmith if available, otherwise returns a mock ID.
+        The run is created in the background; this only queues it.
         
         Args:
             name: Name of the run
@@ -115,30 +295,42 @@ class LangSmithService:
         Returns:
             Run ID (real or mock)
         """
-        if self.initialized and self.client:
-            try:
-                # Try to create a real run
-                run = self.client.create_run(
-                    project_name=self.project_name,
-                    name=name,
-                    inputs=inputs,
-                    **kwargs
-                )
-                logger.info(f"Created LangSmith trace run: {run.id}")
-                return run.id
-            except Exception as e:
-                logger.error(f"Failed to create LangSmith run: {e}")
-                # Fall back to mock
+        if self._sdk_available():
+            # The run ID is generated locally so the run can be created in the
+            # background and still be updated by ID later; each run is the root
+            # of its own trace
+            run_id = str(uuid.uuid4())
+            start_time = datetime.now(timezone.utc)
+            dotted_order = f"{start_time.strftime('%Y%m%dT%H%M%S%fZ')}{run_id}"
+            queued = self._enqueue("create", {
+                "id": run_id,
+                "trace_id": run_id,
+                "dotted_order": dotted_order,
+                "session_name": self.project_name,
+                "name": name,
+                "inputs": inputs,
+                "run_type": kwargs.pop("run_type", "chain"),
+                "start_time": start_time,
+                **kwargs
+            })
+            if queued:
+                self._run_orders[run_id] = dotted_order
+                if len(self._run_orders) > MAX_TRACKED_RUNS:
+                    self._run_orders.popitem(last=False)
+                logger.info("Queued LangSmith trace run: %s", run_id)
+                return run_id
+            # Fall back to mock
         
         # Generate mock run ID            
-        run_id = f"mock-run-{name}-{os.urandom(4).hex()}"
-        logger.info(f"[MOCK] Created LangSmith trace run: {run_id}")
+        run_id = f"mock-run-{name}-{_MOCK_PREFIX}{next(_mock_counter):x}"
+        logger.info("[MOCK] Created LangSmith trace run: %s", run_id)
         return run_id
     
     async def update_run(self, run_id: str, outputs: Dict[str, Any] = None, error: str = None) -> bool:
         """
         Update a LangSmith run with outputs or error.
         Uses real LangSmith if available, otherwise simulates.
+        The update is sent in the background; this only queues it.
         
         Args:
             run_id: ID of the run to update
@@ -146,35 +338,31 @@ class LangSmithService:
             error: Optional error to add to the run
             
         Returns:
-            True if successful, False otherwise
+            True if the update was queued (or simulated), False if it was dropped
         """
-        if self.initialized and self.client and not run_id.startswith("mock-"):
-            try:
-                # Try to update a real run
-                if error:
-                    self.client.update_run(
-                        run_id=run_id,
-                        error=error,
-                        end_time=None  # Let LangSmith set the time
-                    )
-                    logger.info(f"Updated LangSmith run with error: {run_id}")
-                else:
-                    self.client.update_run(
-                        run_id=run_id,
-                        outputs=outputs or {},
-                        end_time=None  # Let LangSmith set the time 
-                    )
-                    logger.info(f"Updated LangSmith run with outputs: {run_id}")
-                return True
-            except Exception as e:
-                logger.error(f"Failed to update LangSmith run: {e}")
+        if self._live and not run_id.startswith("mock-"):
+            dotted_order = self._run_orders.pop(run_id, None)
+            if dotted_order is None:
+                logger.warning("Cannot update unknown LangSmith run: %s", run_id)
                 return False
+            
+            run = {
+                "id": run_id,
+                "trace_id": run_id,
+                "dotted_order": dotted_order,
+                "end_time": datetime.now(timezone.utc)
+            }
+            if error:
+                run["error"] = error
+            else:
+                run["outputs"] = outputs or {}
+            return self._enqueue("update", run)
         
         # Mock behavior
         if error:
-            logger.info(f"[MOCK] Updated LangSmith run with error: {run_id}")
+            logger.info("[MOCK] Updated LangSmith run with error: %s", run_id)
         else:
-            logger.info(f"[MOCK] Updated LangSmith run with outputs: {run_id}")
+            logger.info("[MOCK] Updated LangSmith run with outputs: %s", run_id)
         return True
     
     async def evaluate_run(self, run_id: str, evaluators: List[str]) -> Dict[str, Any]:
@@ -189,7 +377,7 @@ class LangSmithService:
         Returns:
             Evaluation results (real or mock)
         """
-        if self.initialized and self.client and not run_id.startswith("mock-"):
+        if self._live and not run_id.startswith("mock-"):
             try:
                 # Note: This is a placeholder as the real implementation would depend
                 # on how LangSmith evaluators are set up in your account
@@ -199,21 +387,52 @@ class LangSmithService:
                 logger.warning("Real LangSmith evaluation not fully implemented, using mock data")
                 # Fall back to mock implementation
             except Exception as e:
-                logger.error(f"Failed to evaluate LangSmith run: {e}")
+                logger.warning("Failed to evaluate LangSmith run: %s", e)
                 # Fall back to mock implementation
         
         # Mock behavior
         results = {}
         for evaluator in evaluators:
             results[evaluator] = {
-                "evaluation_id": f"mock-eval-{evaluator}-{os.urandom(4).hex()}",
+                "evaluation_id": f"mock-eval-{evaluator}-{_MOCK_PREFIX}{next(_mock_counter):x}",
                 "score": 0.85,  # Mock score
                 "feedback": "Mock feedback for evaluation"
             }
         
-        logger.info(f"[MOCK] Evaluated LangSmith run: {run_id}")
+        logger.info("[MOCK] Evaluated LangSmith run: %s", run_id)
         return {"status": "success", "evaluations": results}
     
+    def _get_run_metrics_sync(self, days: int) -> Dict[str, Any]:
+        """Aggregate run metrics in a single pass over the SDK's paged run iterator."""
+        runs = self.client.list_runs(
+            project_name=self.project_name,
+            start_time=datetime.now(timezone.utc) - timedelta(days=days)
+        )
+        
+        total_runs = 0
+        error_runs = 0
+        latency_sum = 0.0
+        latency_count = 0
+        run_types = Counter()
+        for run in runs:
+            total_runs += 1
+            if run.error is not None:
+                error_runs += 1
+            if run.end_time and run.start_time:
+                latency_sum += (run.end_time - run.start_time).total_seconds()
+                latency_count += 1
+            run_types[run.run_type or "unknown"] += 1
+        
+        successful_runs = total_runs - error_runs
+        return {
+            "total_runs": total_runs,
+            "successful_runs": successful_runs,
+            "error_runs": error_runs,
+            "success_rate": successful_runs / total_runs if total_runs else 0.0,
+            "average_latency_seconds": latency_sum / latency_count if latency_count else 0.0,
+            "run_types": dict(run_types)
+        }
+    
     async def get_run_metrics(self, days: int = 7) -> Dict[str, Any]:
         """
         Get metrics for runs in the project.
@@ -225,17 +444,14 @@ class LangSmithService:
         Returns:
             Metrics data (real or mock)
         """
-        if self.initialized and self.client:
+        if self._sdk_available():
             try:
-                # Try to get real metrics
-                # Note: The exact API might differ based on LangSmith's client implementation
-                # This is a placeholder for what a real implementation might look like
-                
-                # For now, we return mock data even with a real client
-                # In a production environment, you would implement real metrics retrieval
-                logger.warning("Real LangSmith metrics retrieval not fully implemented, using mock data")
+                metrics = await self._run_sdk(self._get_run_metrics_sync, days)
+                self._record_success()
+                return metrics
             except Exception as e:
-                logger.error(f"Failed to get LangSmith metrics: {e}")
+                self._record_failure()
+                logger.warning("Failed to get LangSmith metrics: %s", e)
         
         # Return mock data
         return {
@@ -250,55 +466,174 @@ class LangSmithService:
             }
         }
         
-    async def list_runs(self, limit: int = 10) -> List[Dict[str, Any]]:
+    @staticmethod
+    def _run_to_dict(run) -> Dict[str, Any]:
+        """Convert an SDK run to the serializable dict returned by list_runs."""
+        result = {field: getattr(run, field, None) for field in _RUN_FIELDS}
+        for field in ("start_time", "end_time"):
+            if result[field] is not None:
+                result[field] = str(result[field])
+        if result["status"] is None:
+            result["status"] = "success"
+        
+        # Expose the model name where the cost sync looks for it
+        extra = dict(getattr(run, "extra", None) or {})
+        model_name = (
+            (extra.get("invocation_params") or {}).get("model_name")
+            or (extra.get("metadata") or {}).get("ls_model_name")
+        )
+        if model_name:
+            extra.setdefault("model_name", model_name)
+        result["extra"] = extra
+        
+        # Parent runs report the summed token counts of their children, so only
+        # LLM runs carry tokens to keep totals from being counted twice
+        if getattr(run, "run_type", None) == "llm":
+            result["input_tokens"] = getattr(run, "prompt_tokens", None) or 0
+            result["output_tokens"] = getattr(run, "completion_tokens", None) or 0
+        return result
+    
+    async def iter_runs(self, limit: Optional[int] = 10, start_time: Optional[str] = None,
+                        end_time: Optional[str] = None,
+                        strict: bool = False) -> AsyncIterator[Dict[str, Any]]:
         """
-        List recent runs from LangSmith.
-        Uses real LangSmith if available, otherwise returns mock data.
+        Stream recent runs from LangSmith.
+        Uses real LangSmith if available, otherwise yields mock data.
         
         Args:
-            limit: Maximum number of runs to return
+            limit: Maximum number of runs to return, or None for all matching runs
+            start_time: Only return runs started at or after this ISO timestamp
+            end_time: Only return runs started before this ISO timestamp
+            strict: Raise if LangSmith is unavailable or fails instead of
+                falling back to mock data
             
-        Returns:
-            List of runs (real or mock)
+        Yields:
+            Runs (real or mock)
         """
-        if self.initialized and self.client:
+        sdk_available = self._sdk_available()
+        if strict and not sdk_available:
+            raise RuntimeError("LangSmith is not available")
+        
+        if sdk_available:
+            count = 0
             try:
-                # Try to list real runs
-                runs = self.client.list_runs(
+                runs = await self._run_sdk(
+                    self.client.list_runs,
                     project_name=self.project_name,
-                    limit=limit
+                    limit=limit,
+                    start_time=datetime.fromisoformat(start_time) if start_time else None,
+                    filter=f'lt(start_time, "{end_time}")' if end_time else None,
+                    select=_RUN_SELECT
                 )
                 
-                # Convert to serializable format
-                result = []
-                for run in runs:
-                    result.append({
-                        "id": run.id,
-                        "name": run.name,
-                        "start_time": str(run.start_time) if hasattr(run, 'start_time') else None,
-                        "end_time": str(run.end_time) if hasattr(run, 'end_time') else None,
-                        "status": run.status if hasattr(run, 'status') else "success"
-                    })
+                # The SDK pages lazily over blocking HTTP, so pull runs on the pool
+                # a page at a time
+                while True:
+                    page = await self._run_sdk(
+                        lambda: [self._run_to_dict(run) for run in itertools.islice(runs, RUN_PAGE_SIZE)]
+                    )
+                    if not page:
+                        break
+                    count += len(page)
+                    for run in page:
+                        yield run
                 
-                logger.info(f"Retrieved {len(result)} runs from LangSmith")
-                return result
+                self._record_success()
+                logger.info("Retrieved %s runs from LangSmith", count)
+                return
             except Exception as e:
-                logger.error(f"Failed to list LangSmith runs: {e}")
+                self._record_failure()
+                logger.warning("Failed to list LangSmith runs: %s", e)
+                if strict:
+                    raise
+                # Runs already yielded can't be taken back, so only fall back
+                # to mock data if nothing was returned
+                if count:
+                    return
         
         # Return mock data
-        mock_runs = []
-        for i in range(min(limit, 5)):  # Mock only up to 5 runs
-            mock_runs.append({
-                "id": f"mock-run-{os.urandom(4).hex()}",
+        mock_count = 5 if limit is None else min(limit, 5)  # Mock only up to 5 runs
+        for i in range(mock_count):
+            yield {
+                "id": f"mock-run-{_MOCK_PREFIX}{next(_mock_counter):x}",
                 "name": f"Mock Run {i+1}",
                 "start_time": "2025-04-17T00:00:00Z",
                 "end_time": "2025-04-17T00:01:00Z",
-                "status": "success"
-            })
+                "status": "success",
+                "error": None,
+                "extra": {}
+            }
         
-        logger.info(f"[MOCK] Returned {len(mock_runs)} mock runs")
-        return mock_runs
+        logger.info("[MOCK] Returned %s mock runs", mock_count)
+    
+    async def list_runs(self, limit: Optional[int] = 10, start_time: Optional[str] = None,
+                        end_time: Optional[str] = None,
+                        strict: bool = False) -> List[Dict[str, Any]]:
+        """
+        List recent runs from LangSmith.
+        Uses real LangSmith if available, otherwise returns mock data.
+        
+        Args:
+            limit: Maximum number of runs to return, or None for all matching runs
+            start_time: Only return runs started at or after this ISO timestamp
+            end_time: Only return runs started before this ISO timestamp
+            strict: Raise if LangSmith is unavailable or fails instead of
+                falling back to mock data
+            
+        Returns:
+            List of runs (real or mock)
+        """
+        return [run async for run in self.iter_runs(limit, start_time, end_time, strict)]
+
+
+class _NullLangSmithService:
+    """No-op stand-in used when LangSmith is disabled with LANGSMITH_ENABLED=false."""
+    
+    initialized = False
+    
+    async def startup(self) -> None:
+        return None
+    
+    async def aclose(self) -> None:
+        return None
+    
+    def close(self) -> None:
+        return None
+    
+    def is_configured(self) -> bool:
+        return False
+    
+    def get_callback_handler(self, run_name: str = None, tags: List[str] = None):
+        return None
+    
+    async def trace_run(self, name: str, inputs: Dict[str, Any], **kwargs) -> Optional[str]:
+        return None
+    
+    async def update_run(self, run_id: str, outputs: Dict[str, Any] = None, error: str = None) -> bool:
+        return True
+    
+    async def evaluate_run(self, run_id: str, evaluators: List[str]) -> Dict[str, Any]:
+        return {"status": "disabled", "evaluations": {}}
+    
+    async def get_run_metrics(self, days: int = 7) -> Dict[str, Any]:
+        return {}
+    
+    async def iter_runs(self, limit: Optional[int] = 10, start_time: Optional[str] = None,
+                        end_time: Optional[str] = None,
+                        strict: bool = False) -> AsyncIterator[Dict[str, Any]]:
+        return
+        yield
+    
+    async def list_runs(self, limit: Optional[int] = 10, start_time: Optional[str] = None,
+                        end_time: Optional[str] = None,
+                        strict: bool = False) -> List[Dict[str, Any]]:
+        return []
 
 
-# Create a singleton instance
-langsmith_service = LangSmithService()
\ No newline at end of file
+@functools.lru_cache(maxsize=1)
+def get_langsmith_service() -> Union[LangSmithService, _NullLangSmithService]:
+    """Get or create the LangSmith service singleton."""
+    if os.environ.get("LANGSMITH_ENABLED", "true").lower() in ("0", "false", "no"):
+        logger.info("LangSmith disabled by LANGSMITH_ENABLED")
+        return _NullLangSmithService()
+    return LangSmithService()
\ No newline at end of file
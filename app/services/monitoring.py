@@ -3,13 +3,18 @@ Monitoring service for the interview evaluator application.
 Handles system monitoring, metrics collection, and alerting.
 """
 
-import json
+import asyncio
+import itertools
 import logging
 import os
+import secrets
+from collections import deque
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Union
+from types import MappingProxyType
+from typing import Deque, Dict, List, Mapping, Optional, Union
 
 import httpx
+import orjson
 import sentry_sdk
 from fastapi import HTTPException
 from pydantic import BaseModel
@@ -27,6 +32,17 @@ ALERT_LEVELS = {
     "ERROR": 2,
     "CRITICAL": 3
 }
+# Alert levels that are also reported to Sentry
+SENTRY_ALERT_LEVELS = frozenset({"ERROR", "CRITICAL"})
+
+# Maximum number of alerts kept in memory; older ones are dropped
+MAX_ALERTS = 10_000
+# Values kept per metric; the deque drops the oldest on append
+MAX_METRIC_VALUES = 1000
+JSON_HEADERS = {"content-type": "application/json"}
+# Metric rows are buffered and stored in bulk once either limit is reached
+METRIC_FLUSH_BATCH_SIZE = 200
+METRIC_FLUSH_INTERVAL_SECONDS = 2.0
 
 
 class MetricValue(BaseModel):
@@ -40,7 +56,7 @@ class Metric(BaseModel):
     name: str
     description: str
     unit: Optional[str] = None
-    values: List[MetricValue]
+    values: Deque[MetricValue]
 
 
 class Alert(BaseModel):
@@ -55,6 +71,24 @@ class Alert(BaseModel):
     resolved_at: Optional[datetime] = None
 
 
+def _parse_run_time(value: Union[str, datetime]) -> datetime:
+    """Parse a run timestamp as returned by LangSmith list_runs."""
+    if isinstance(value, datetime):
+        return value
+    # fromisoformat only accepts a trailing "Z" from Python 3.11
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+def _recorded_since(items: Deque, cutoff: datetime) -> List:
+    """Return items timestamped at or after cutoff, oldest first.
+
+    Items are appended in time order, so only the recent tail is visited.
+    """
+    recent = list(itertools.takewhile(lambda item: item.timestamp >= cutoff, reversed(items)))
+    recent.reverse()
+    return recent
+
+
 class MonitoringService:
     """Service for system monitoring, metrics collection, and alerting."""
 
@@ -64,7 +98,11 @@ class MonitoringService:
         """Initialize the monitoring service."""
         self.supabase_client = supabase_client
         self.langsmith_client = langsmith_client
-        self.alerts: List[Alert] = []
+        self.alerts: Deque[Alert] = deque(maxlen=MAX_ALERTS)
+        # Alerts indexed by ID for O(1) acknowledge/resolve
+        self._alerts_by_id: Dict[str, Alert] = {}
+        # Alert sequence numbers keep IDs unique once old alerts are dropped
+        self._alert_seq = itertools.count(1)
         
         # Default metrics
         self.metrics: Dict[str, Metric] = {
@@ -72,122 +110,189 @@ class MonitoringService:
                 name="api_requests",
                 description="Number of API requests",
                 unit="count",
-                values=[]
+                values=deque(maxlen=MAX_METRIC_VALUES)
             ),
             "evaluation_count": Metric(
                 name="evaluation_count",
                 description="Number of evaluations performed",
                 unit="count",
-                values=[]
+                values=deque(maxlen=MAX_METRIC_VALUES)
             ),
             "average_evaluation_time": Metric(
                 name="average_evaluation_time",
                 description="Average time to complete an evaluation",
                 unit="seconds",
-                values=[]
+                values=deque(maxlen=MAX_METRIC_VALUES)
             ),
             "error_count": Metric(
                 name="error_count",
                 description="Number of errors",
                 unit="count",
-                values=[]
+                values=deque(maxlen=MAX_METRIC_VALUES)
             ),
             "llm_tokens_used": Metric(
                 name="llm_tokens_used",
                 description="Number of LLM tokens used",
                 unit="count",
-                values=[]
+                values=deque(maxlen=MAX_METRIC_VALUES)
             ),
             "llm_cost": Metric(
                 name="llm_cost",
                 description="Estimated cost of LLM usage",
                 unit="USD",
-                values=[]
+                values=deque(maxlen=MAX_METRIC_VALUES)
             ),
         }
         
         # Initialize webhook endpoints for alerting
-        self.webhook_endpoints = []
-        if os.getenv("ALERT_WEBHOOK"):
-            self.webhook_endpoints.append(os.getenv("ALERT_WEBHOOK"))
+        webhook = os.getenv("ALERT_WEBHOOK")
+        self.webhook_endpoints = [webhook] if webhook else []
+        
+        # Shared HTTP client for webhook notifications (created on first use)
+        self._http: Optional[httpx.AsyncClient] = None
+        
+        # Metric rows waiting to be stored, flushed by a background task
+        self._metric_buffer: List[Dict] = []
+        self._flusher_task: Optional[asyncio.Task] = None
+    
+    def _get_http_client(self) -> httpx.AsyncClient:
+        """Get the shared HTTP client, creating it if needed."""
+        if self._http is None or self._http.is_closed:
+            self._http = httpx.AsyncClient(
+                timeout=10.0,
+                limits=httpx.Limits(max_keepalive_connections=20, max_connections=100)
+            )
+        return self._http
+    
+    async def aclose(self):
+        """Store buffered metrics, stop the flusher and close the shared HTTP client."""
+        if self._flusher_task is not None:
+            self._flusher_task.cancel()
+            try:
+                await self._flusher_task
+            except asyncio.CancelledError:
+                pass
+            self._flusher_task = None
+        await self._flush_metrics()
+        
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
 
-    async def record_metric(self, name: str, value: Union[int, float, str, bool]):
-        """Record a metric value."""
+    def _append_metric_value(self, name: str, value: Union[int, float, str, bool],
+                             timestamp: datetime) -> Dict:
+        """Append a value to a metric in memory and return its storage row."""
         if name not in self.metrics:
             self.metrics[name] = Metric(
                 name=name,
                 description=f"Custom metric: {name}",
-                values=[]
+                values=deque(maxlen=MAX_METRIC_VALUES)
             )
             
-        metric_value = MetricValue(
-            timestamp=datetime.now(),
+        # The timestamp is generated in-process and values come from typed
+        # internal callers, so skip Pydantic validation
+        metric_value = MetricValue.model_construct(
+            timestamp=timestamp,
             value=value
         )
+        # Bounded deque, so the oldest value is dropped automatically
         self.metrics[name].values.append(metric_value)
         
-        # Truncate to last 1000 values to prevent memory issues
-        if len(self.metrics[name].values) > 1000:
-            self.metrics[name].values = self.metrics[name].values[-1000:]
-        
-        # If we have Supabase, store the metric
+        return {
+            "name": name,
+            "value": orjson.dumps(value).decode() if not isinstance(value, (int, float, bool)) else value,
+            "recorded_at": timestamp.isoformat()
+        }
+    
+    async def _store_metric_rows(self, rows: List[Dict]):
+        """Store metric rows in Supabase, if configured."""
         if self.supabase_client:
             try:
-                await self.supabase_client.from_("metrics").insert({
-                    "name": name,
-                    "value": json.dumps(value) if not isinstance(value, (int, float, bool)) else value,
-                    "recorded_at": metric_value.timestamp.isoformat()
-                }).execute()
+                await self.supabase_client.from_("metrics").insert(rows).execute()
             except Exception as e:
                 logger.error(f"Failed to store metric in Supabase: {e}")
                 # Report to Sentry if available
                 sentry_sdk.capture_exception(e)
     
+    async def _buffer_metric_rows(self, rows: List[Dict]):
+        """Queue metric rows for storage, flushing once a full batch is buffered."""
+        if not self.supabase_client:
+            return
+        
+        self._metric_buffer.extend(rows)
+        if len(self._metric_buffer) >= METRIC_FLUSH_BATCH_SIZE:
+            await self._flush_metrics()
+        elif self._flusher_task is None or self._flusher_task.done():
+            self._flusher_task = asyncio.create_task(self._flush_loop())
+    
+    async def _flush_metrics(self):
+        """Store all buffered metric rows with a single insert."""
+        if not self._metric_buffer:
+            return
+        # Swap the buffer before awaiting so new rows go to the next batch
+        batch, self._metric_buffer = self._metric_buffer, []
+        await self._store_metric_rows(batch)
+    
+    async def _flush_loop(self):
+        """Flush buffered metric rows periodically until the buffer stays empty."""
+        while self._metric_buffer:
+            await asyncio.sleep(METRIC_FLUSH_INTERVAL_SECONDS)
+            await self._flush_metrics()
+    
+    async def record_metric(self, name: str, value: Union[int, float, str, bool]):
+        """Record a metric value."""
+        row = self._append_metric_value(name, value, datetime.now())
+        
+        # If we have Supabase, queue the metric for the next bulk insert
+        await self._buffer_metric_rows([row])
+    
+    async def record_metrics(self, values: Dict[str, Union[int, float, str, bool]]):
+        """Record several metric values at once with a shared timestamp."""
+        timestamp = datetime.now()
+        rows = [self._append_metric_value(name, value, timestamp) for name, value in values.items()]
+        
+        # If we have Supabase, queue all metrics for the next bulk insert
+        await self._buffer_metric_rows(rows)
+    
     async def get_metrics(self, name: Optional[str] = None, 
-                         time_range: Optional[timedelta] = None) -> Dict[str, Metric]:
-        """Get metrics, optionally filtered by name and time range."""
-        now = datetime.now()
-        result = {}
+                         time_range: Optional[timedelta] = None) -> Mapping[str, Metric]:
+        """Get metrics, optionally filtered by name and time range.
+
+        Unfiltered results reference the live metrics and must be treated as read-only.
+        """
+        if name and name not in self.metrics:
+            raise HTTPException(status_code=404, detail=f"Metric '{name}' not found")
         
-        if name:
-            if name not in self.metrics:
-                raise HTTPException(status_code=404, detail=f"Metric '{name}' not found")
-            
-            metric = self.metrics[name]
-            if time_range:
-                filtered_values = [v for v in metric.values 
-                                  if now - v.timestamp <= time_range]
-                result[name] = Metric(
-                    name=metric.name,
-                    description=metric.description,
-                    unit=metric.unit,
-                    values=filtered_values
-                )
-            else:
-                result[name] = metric
-        else:
-            for metric_name, metric in self.metrics.items():
-                if time_range:
-                    filtered_values = [v for v in metric.values 
-                                      if now - v.timestamp <= time_range]
-                    result[metric_name] = Metric(
-                        name=metric.name,
-                        description=metric.description,
-                        unit=metric.unit,
-                        values=filtered_values
-                    )
-                else:
-                    result[metric_name] = metric
-                    
-        return result
+        if not time_range:
+            if name:
+                return {name: self.metrics[name]}
+            return MappingProxyType(self.metrics)
+        
+        # Hoist the cutoff so filtering only compares datetimes
+        cutoff = datetime.now() - time_range
+        selected = {name: self.metrics[name]} if name else self.metrics
+        
+        # Stored values are already validated, so skip pydantic validation here
+        return {
+            metric_name: Metric.model_construct(
+                name=metric.name,
+                description=metric.description,
+                unit=metric.unit,
+                values=deque(_recorded_since(metric.values, cutoff))
+            )
+            for metric_name, metric in selected.items()
+        }
     
     async def create_alert(self, level: str, message: str, source: str) -> Alert:
         """Create a new alert."""
         if level not in ALERT_LEVELS:
             raise ValueError(f"Invalid alert level: {level}")
         
-        alert_id = f"alert_{len(self.alerts) + 1}_{datetime.now().strftime('%Y%m%d%H%M%S')}"
-        alert = Alert(
+        # The random suffix keeps IDs unique across restarts, when the sequence resets
+        alert_id = f"alert_{next(self._alert_seq)}_{secrets.token_hex(4)}"
+        # All fields are generated in-process (level is checked above),
+        # so skip Pydantic validation
+        alert = Alert.model_construct(
             id=alert_id,
             timestamp=datetime.now(),
             level=level,
@@ -195,14 +300,18 @@ class MonitoringService:
             source=source
         )
         
+        # Add to alerts, dropping the oldest one once the buffer is full
+        if len(self.alerts) == self.alerts.maxlen:
+            del self._alerts_by_id[self.alerts[0].id]
         self.alerts.append(alert)
+        self._alerts_by_id[alert_id] = alert
         
         # Log the alert
         log_method = getattr(logger, level.lower(), logger.info)
         log_method(f"ALERT [{level}] from {source}: {message}")
         
         # Report to Sentry if critical or error
-        if level in ["ERROR", "CRITICAL"]:
+        if level in SENTRY_ALERT_LEVELS:
             sentry_sdk.capture_message(
                 f"Alert [{level}] from {source}: {message}",
                 level=level.lower()
@@ -216,66 +325,68 @@ class MonitoringService:
     
     async def _send_alert_notifications(self, alert: Alert):
         """Send alert notifications to configured endpoints."""
-        for endpoint in self.webhook_endpoints:
-            try:
-                async with httpx.AsyncClient() as client:
-                    await client.post(
-                        endpoint,
-                        json={
-                            "text": f"🚨 *CRITICAL ALERT*: {alert.message}",
-                            "attachments": [
-                                {
-                                    "color": "#FF0000",
-                                    "fields": [
-                                        {"title": "Source", "value": alert.source, "short": True},
-                                        {"title": "Time", "value": alert.timestamp.isoformat(), "short": True}
-                                    ]
-                                }
-                            ]
-                        }
-                    )
-            except Exception as e:
-                logger.error(f"Failed to send alert notification: {e}")
-                sentry_sdk.capture_exception(e)
+        # Serialize once; every endpoint receives the same body
+        body = orjson.dumps({
+            "text": f"🚨 *CRITICAL ALERT*: {alert.message}",
+            "attachments": [
+                {
+                    "color": "#FF0000",
+                    "fields": [
+                        {"title": "Source", "value": alert.source, "short": True},
+                        {"title": "Time", "value": alert.timestamp.isoformat(), "short": True}
+                    ]
+                }
+            ]
+        })
+        
+        # Send to all endpoints concurrently over the shared client
+        client = self._get_http_client()
+        results = await asyncio.gather(
+            *(client.post(endpoint, content=body, headers=JSON_HEADERS) for endpoint in self.webhook_endpoints),
+            return_exceptions=True
+        )
+        for result in results:
+            if isinstance(result, Exception):
+                logger.error(f"Failed to send alert notification: {result}")
+                sentry_sdk.capture_exception(result)
     
     async def get_alerts(self, 
                         level: Optional[str] = None, 
                         resolved: Optional[bool] = None,
                         time_range: Optional[timedelta] = None) -> List[Alert]:
         """Get alerts, optionally filtered by level, resolved status, and time range."""
-        now = datetime.now()
-        filtered_alerts = self.alerts
+        if level and level not in ALERT_LEVELS:
+            raise ValueError(f"Invalid alert level: {level}")
+        
+        if time_range:
+            filtered_alerts = _recorded_since(self.alerts, datetime.now() - time_range)
+        else:
+            filtered_alerts = list(self.alerts)
         
         if level:
-            if level not in ALERT_LEVELS:
-                raise ValueError(f"Invalid alert level: {level}")
             filtered_alerts = [a for a in filtered_alerts if a.level == level]
             
         if resolved is not None:
             filtered_alerts = [a for a in filtered_alerts if a.resolved == resolved]
-            
-        if time_range:
-            filtered_alerts = [a for a in filtered_alerts 
-                              if now - a.timestamp <= time_range]
                               
         return filtered_alerts
     
     async def acknowledge_alert(self, alert_id: str) -> Alert:
         """Acknowledge an alert."""
-        for alert in self.alerts:
-            if alert.id == alert_id:
-                alert.acknowledged = True
-                return alert
+        alert = self._alerts_by_id.get(alert_id)
+        if alert is not None:
+            alert.acknowledged = True
+            return alert
                 
         raise HTTPException(status_code=404, detail=f"Alert with ID '{alert_id}' not found")
     
     async def resolve_alert(self, alert_id: str) -> Alert:
         """Resolve an alert."""
-        for alert in self.alerts:
-            if alert.id == alert_id:
-                alert.resolved = True
-                alert.resolved_at = datetime.now()
-                return alert
+        alert = self._alerts_by_id.get(alert_id)
+        if alert is not None:
+            alert.resolved = True
+            alert.resolved_at = datetime.now()
+            return alert
                 
         raise HTTPException(status_code=404, detail=f"Alert with ID '{alert_id}' not found")
     
@@ -291,30 +402,36 @@ class MonitoringService:
                 start_time=(datetime.now() - timedelta(days=7)).isoformat()
             )
             
-            # Calculate metrics
+            # Calculate run counts, latency and token usage in a single pass
             total_runs = len(runs)
-            successful_runs = len([r for r in runs if r.get("error") is None])
-            failed_runs = total_runs - successful_runs
+            successful_runs = 0
+            latency_sum = 0
+            latency_count = 0
+            input_tokens = 0
+            output_tokens = 0
+            for r in runs:
+                if r.get("error") is None:
+                    successful_runs += 1
+                end_time = r.get("end_time")
+                start_time = r.get("start_time")
+                if end_time and start_time:
+                    latency_sum += (_parse_run_time(end_time) - _parse_run_time(start_time)).total_seconds()
+                    latency_count += 1
+                input_tokens += r.get("input_tokens", 0)
+                output_tokens += r.get("output_tokens", 0)
             
-            # Calculate average latency
-            latencies = [
-                r.get("end_time", 0) - r.get("start_time", 0) 
-                for r in runs 
-                if r.get("end_time") and r.get("start_time")
-            ]
-            avg_latency = sum(latencies) / len(latencies) if latencies else 0
-            
-            # Calculate token usage and cost (estimated)
-            input_tokens = sum(r.get("input_tokens", 0) for r in runs)
-            output_tokens = sum(r.get("output_tokens", 0) for r in runs)
+            failed_runs = total_runs - successful_runs
+            avg_latency = latency_sum / latency_count if latency_count else 0
             total_tokens = input_tokens + output_tokens
             
             # Estimate cost (simplified)
             estimated_cost = (input_tokens * 0.0000005) + (output_tokens * 0.0000015)
             
             # Update local metrics
-            await self.record_metric("llm_tokens_used", total_tokens)
-            await self.record_metric("llm_cost", estimated_cost)
+            await self.record_metrics({
+                "llm_tokens_used": total_tokens,
+                "llm_cost": estimated_cost
+            })
             
             return {
                 "total_runs": total_runs,
@@ -337,7 +454,7 @@ class MonitoringService:
         """Get cost projection for the next month based on current usage."""
         try:
             # Get current month's token usage
-            llm_tokens = [v.value for v in self.metrics["llm_tokens_used"].values]
+            llm_tokens = self.metrics["llm_tokens_used"].values
             if not llm_tokens:
                 return {
                     "current_usage_tokens": 0,
@@ -346,8 +463,9 @@ class MonitoringService:
                 }
             
             # Calculate daily average
+            current_usage = sum(v.value for v in llm_tokens)
             days_with_data = min(30, len(llm_tokens))
-            daily_average = sum(llm_tokens) / days_with_data
+            daily_average = current_usage / days_with_data
             
             # Project for 30 days
             projected_monthly = daily_average * 30
@@ -362,7 +480,7 @@ class MonitoringService:
             projected_cost = (projected_input_tokens * 0.0000005) + (projected_output_tokens * 0.0000015)
             
             return {
-                "current_usage_tokens": sum(llm_tokens),
+                "current_usage_tokens": current_usage,
                 "projected_monthly_tokens": projected_monthly,
                 "projected_monthly_cost_usd": projected_cost
             }
@@ -372,34 +490,41 @@ class MonitoringService:
             sentry_sdk.capture_exception(e)
             return {"error": str(e)}
     
+    def _sum_since(self, name: str, cutoff: datetime) -> Union[int, float]:
+        """Sum a metric's values recorded after cutoff."""
+        # Values are appended in time order, so walk back from the newest
+        total = 0
+        for v in reversed(self.metrics[name].values):
+            if v.timestamp <= cutoff:
+                break
+            total += v.value
+        return total
+    
     async def get_system_health(self) -> Dict:
         """Get overall system health status."""
-        # Check for recent critical alerts
-        recent_critical = [
-            a for a in self.alerts 
-            if a.level == "CRITICAL" 
-            and not a.resolved 
-            and (datetime.now() - a.timestamp) < timedelta(hours=24)
-        ]
+        now = datetime.now()
+        cutoff = now - timedelta(hours=24)
+        
+        # Check for recent critical alerts (newest first, so stop at the cutoff)
+        recent_critical = 0
+        for a in reversed(self.alerts):
+            if a.timestamp <= cutoff:
+                break
+            if a.level == "CRITICAL" and not a.resolved:
+                recent_critical += 1
         
         # Get error rate
         recent_errors = 0
         recent_requests = 0
         
         if "error_count" in self.metrics and "api_requests" in self.metrics:
-            recent_errors = sum(
-                v.value for v in self.metrics["error_count"].values
-                if (datetime.now() - v.timestamp) < timedelta(hours=24)
-            )
-            recent_requests = sum(
-                v.value for v in self.metrics["api_requests"].values
-                if (datetime.now() - v.timestamp) < timedelta(hours=24)
-            )
+            recent_errors = self._sum_since("error_count", cutoff)
+            recent_requests = self._sum_since("api_requests", cutoff)
         
         error_rate = (recent_errors / recent_requests) * 100 if recent_requests > 0 else 0
         
         # Determine overall health
-        if len(recent_critical) > 0:
+        if recent_critical > 0:
             status = "critical"
         elif error_rate > 5:
             status = "degraded"
@@ -408,10 +533,10 @@ class MonitoringService:
         
         return {
             "status": status,
-            "unresolved_critical_alerts": len(recent_critical),
+            "unresolved_critical_alerts": recent_critical,
             "error_rate_24h": error_rate,
             "api_requests_24h": recent_requests,
-            "last_updated": datetime.now().isoformat()
+            "last_updated": now.isoformat()
         }
 
 
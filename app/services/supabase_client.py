@@ -1,14 +1,25 @@
+import functools
 import os
 import logging
-import json
+import time
 from typing import Optional, Dict, Any, List
 from datetime import datetime
 
 import httpx
+import orjson
 from supabase import create_client, Client
 
 logger = logging.getLogger(__name__)
 
+# Ask PostgREST to return the written rows so writes can be confirmed
+REST_HEADERS = {
+    "Content-Type": "application/json",
+    "Prefer": "return=representation",
+}
+
+# How long a connection check result is reused before checking again
+CONNECTION_CHECK_TTL_SECONDS = 5.0
+
 class SupabaseService:
     """Service for interacting with Supabase"""
     
@@ -16,6 +27,11 @@ class SupabaseService:
         """Initialize the Supabase client"""
         self.initialized = False
         self.client = None
+        # Async PostgREST client for write paths (created on first use)
+        self._rest: Optional[httpx.AsyncClient] = None
+        # Last connection check result and when it was taken (monotonic clock)
+        self._connected = False
+        self._connected_checked_at: Optional[float] = None
         self.url = os.environ.get("SUPABASE_URL")
         self.key = os.environ.get("SUPABASE_KEY") or os.environ.get("SUPABASE_SERVICE_ROLE_KEY")
         
@@ -33,11 +49,51 @@ class SupabaseService:
             logger.error(f"Failed to initialize Supabase client: {e}")
             self.initialized = False
     
+    def _get_rest_client(self) -> httpx.AsyncClient:
+        """Get the shared async PostgREST client, creating it if needed."""
+        if self._rest is None or self._rest.is_closed:
+            self._rest = httpx.AsyncClient(
+                base_url=f"{self.url}/rest/v1",
+                headers={"apikey": self.key, "Authorization": f"Bearer {self.key}", **REST_HEADERS},
+                limits=httpx.Limits(max_keepalive_connections=20, max_connections=100),
+                timeout=10.0
+            )
+        return self._rest
+    
+    async def aclose(self):
+        """Close the shared async PostgREST client."""
+        if self._rest is not None:
+            await self._rest.aclose()
+            self._rest = None
+    
+    async def _insert_rows(self, table: str, data: Any) -> List[Dict[str, Any]]:
+        """Insert one or more rows through PostgREST and return the stored rows."""
+        response = await self._get_rest_client().post(f"/{table}", content=orjson.dumps(data))
+        response.raise_for_status()
+        return response.json()
+    
+    async def _update_rows(self, table: str, data: Dict[str, Any], **filters: Any) -> List[Dict[str, Any]]:
+        """Update rows matching equality filters through PostgREST and return them."""
+        params = {column: f"eq.{value}" for column, value in filters.items()}
+        response = await self._get_rest_client().patch(f"/{table}", params=params, content=orjson.dumps(data))
+        response.raise_for_status()
+        return response.json()
+    
     def is_connected(self) -> bool:
-        """Check if the Supabase client is connected"""
+        """Check if the Supabase client is connected, reusing recent results"""
         if not self.initialized or not self.client:
             return False
-            
+        
+        now = time.monotonic()
+        if self._connected_checked_at is not None and now - self._connected_checked_at < CONNECTION_CHECK_TTL_SECONDS:
+            return self._connected
+        
+        self._connected = self._check_connection()
+        self._connected_checked_at = now
+        return self._connected
+    
+    def _check_connection(self) -> bool:
+        """Check the connection with a live auth request"""
         try:
             # Use a simple auth check instead of querying a specific table
             # This avoids errors with non-existent tables
@@ -57,7 +113,7 @@ class SupabaseService:
             logger.error(f"Supabase connection check failed: {e}")
             return False
         
-    def store_evaluation_results(self, interview_id: str, results: Dict[str, Any]) -> bool:
+    async def store_evaluation_results(self, interview_id: str, results: Dict[str, Any]) -> bool:
         """Store evaluation results in Supabase"""
         if not self.initialized or not self.client:
             logger.error("Cannot store evaluation results: Supabase client not initialized")
@@ -65,17 +121,18 @@ class SupabaseService:
         
         try:
             # Add timestamp and interview ID
+            now = datetime.now().isoformat()
             data = {
                 "interview_id": interview_id,
                 "results": results,
-                "created_at": datetime.now().isoformat(),
-                "updated_at": datetime.now().isoformat(),
+                "created_at": now,
+                "updated_at": now,
             }
             
             # Store in evaluations table
-            response = self.client.table("evaluations").insert(data).execute()
+            rows = await self._insert_rows("evaluations", data)
             
-            if response.data:
+            if rows:
                 logger.info(f"Evaluation results stored for interview {interview_id}")
                 return True
             else:
@@ -86,29 +143,28 @@ class SupabaseService:
             logger.error(f"Error in store_evaluation_results: {e}", exc_info=True)
             return False
     
-    def create_interview(self, interview_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    @staticmethod
+    def _apply_interview_defaults(interview_data: Dict[str, Any], now: str) -> None:
+        """Fill in the candidate name and timestamps if they are missing"""
+        interview_data.setdefault("candidate_name", "Unknown Candidate")
+        interview_data.setdefault("created_at", now)
+        interview_data.setdefault("updated_at", now)
+    
+    async def create_interview(self, interview_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """Create a new interview record in Supabase"""
         if not self.initialized or not self.client:
             logger.error("Cannot create interview: Supabase client not initialized")
             return None
             
         try:
-            # Ensure required fields
-            if "candidate_name" not in interview_data:
-                interview_data["candidate_name"] = "Unknown Candidate"
-                
-            # Add timestamps if not present
-            if "created_at" not in interview_data:
-                interview_data["created_at"] = datetime.now().isoformat()
-            if "updated_at" not in interview_data:
-                interview_data["updated_at"] = datetime.now().isoformat()
+            self._apply_interview_defaults(interview_data, datetime.now().isoformat())
                 
             # Insert into interviews table
-            response = self.client.table("interviews").insert(interview_data).execute()
+            rows = await self._insert_rows("interviews", interview_data)
             
-            if response.data and len(response.data) > 0:
-                logger.info(f"Interview created with ID: {response.data[0].get('id')}")
-                return response.data[0]
+            if rows:
+                logger.info(f"Interview created with ID: {rows[0].get('id')}")
+                return rows[0]
             else:
                 logger.error("Failed to create interview: No data returned")
                 return None
@@ -117,7 +173,32 @@ class SupabaseService:
             logger.error(f"Error in create_interview: {e}", exc_info=True)
             return None
 
-    def update_interview_status(self, interview_id: str, status: str) -> bool:
+    async def create_interviews_bulk(self, interviews: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Create several interview records with a single bulk insert
+        
+        PostgREST requires every row in a bulk insert to have the same keys.
+        """
+        if not self.initialized or not self.client:
+            logger.error("Cannot create interviews: Supabase client not initialized")
+            return []
+        
+        if not interviews:
+            return []
+            
+        try:
+            now = datetime.now().isoformat()
+            for interview_data in interviews:
+                self._apply_interview_defaults(interview_data, now)
+            
+            rows = await self._insert_rows("interviews", interviews)
+            logger.info(f"Created {len(rows)} interviews")
+            return rows
+                
+        except Exception as e:
+            logger.error(f"Error in create_interviews_bulk: {e}", exc_info=True)
+            return []
+
+    async def update_interview_status(self, interview_id: str, status: str) -> bool:
         """Update the status of an interview in Supabase"""
         if not self.initialized or not self.client:
             logger.error("Cannot update interview status: Supabase client not initialized")
@@ -130,9 +211,9 @@ class SupabaseService:
                 "updated_at": datetime.now().isoformat()
             }
             
-            response = self.client.table("interviews").update(data).eq("id", interview_id).execute()
+            rows = await self._update_rows("interviews", data, id=interview_id)
             
-            if response.data and len(response.data) > 0:
+            if rows:
                 logger.info(f"Interview {interview_id} status updated to '{status}'")
                 return True
             else:
@@ -143,30 +224,30 @@ class SupabaseService:
             logger.error(f"Error in update_interview_status: {e}", exc_info=True)
             return False
 
-    def _store_criteria_evaluations(self, interview_id: str, criteria_evaluations: List[Dict[str, Any]]) -> bool:
+    async def _store_criteria_evaluations(self, interview_id: str, criteria_evaluations: List[Dict[str, Any]]) -> bool:
         """Store criteria evaluations in Supabase"""
         if not self.initialized or not self.client:
             logger.error("Cannot store criteria evaluations: Supabase client not initialized")
             return False
             
         try:
-            # Prepare data for bulk insert
-            data = []
-            for eval_data in criteria_evaluations:
-                data.append({
-                    "interview_id": interview_id,
-                    "criterion": eval_data.get("criterion"),
-                    "score": eval_data.get("score"),
-                    "justification": eval_data.get("justification"),
-                    "supporting_quotes": json.dumps(eval_data.get("supporting_quotes", [])),
-                    "created_at": datetime.now().isoformat()
-                })
+            # Prepare data for bulk insert; all rows share one insertion time
+            created_at = datetime.now().isoformat()
+            data = [{
+                "interview_id": interview_id,
+                "criterion": eval_data.get("criterion"),
+                "score": eval_data.get("score"),
+                "justification": eval_data.get("justification"),
+                # JSONB column, so send the list as-is rather than a JSON string
+                "supporting_quotes": eval_data.get("supporting_quotes", []),
+                "created_at": created_at
+            } for eval_data in criteria_evaluations]
                 
             # Insert into criteria_evaluations table
             if data:
-                response = self.client.table("criteria_evaluations").insert(data).execute()
+                rows = await self._insert_rows("criteria_evaluations", data)
                 
-                if response.data:
+                if rows:
                     logger.info(f"Stored {len(data)} criteria evaluations for interview {interview_id}")
                     return True
                 else:
@@ -180,6 +261,40 @@ class SupabaseService:
             logger.error(f"Error in _store_criteria_evaluations: {e}", exc_info=True)
             return False
     
+    def get_daily_costs(self) -> Optional[List[Dict[str, Any]]]:
+        """Get the persisted daily LLM cost records from Supabase, or None if the query fails"""
+        if not self.initialized or not self.client:
+            logger.warning("Cannot load daily costs: Supabase client not initialized")
+            return []
+            
+        try:
+            response = self.client.table("llm_daily_costs").select("*").execute()
+            return response.data or []
+                
+        except Exception as e:
+            logger.error(f"Error in get_daily_costs: {e}", exc_info=True)
+            return None
+    
+    def upsert_daily_costs(self, records: List[Dict[str, Any]]) -> bool:
+        """Insert or update daily LLM cost records in Supabase"""
+        if not self.initialized or not self.client:
+            logger.warning("Cannot store daily costs: Supabase client not initialized")
+            return False
+            
+        try:
+            response = self.client.table("llm_daily_costs").upsert(records).execute()
+            
+            if response.data:
+                logger.info(f"Stored {len(records)} daily cost records")
+                return True
+            else:
+                logger.error("Failed to store daily costs: No data returned")
+                return False
+                
+        except Exception as e:
+            logger.error(f"Error in upsert_daily_costs: {e}", exc_info=True)
+            return False
+    
     def table(self, table_name: str):
         """Access a Supabase table"""
         if not self.initialized or not self.client:
@@ -203,28 +318,29 @@ class MockTableQuery:
     
     def select(self, columns: str = "*"):
         """Mock select operation"""
-        logger.info(f"[MOCK] SELECT {columns} FROM {self.table_name}")
+        logger.debug("[MOCK] SELECT %s FROM %s", columns, self.table_name)
         return self
     
     def insert(self, data: Dict[str, Any]):
         """Mock insert operation"""
-        logger.info(f"[MOCK] INSERT INTO {self.table_name}: {str(data)[:100]}...")
+        # %.100s only stringifies the payload if the message is emitted
+        logger.debug("[MOCK] INSERT INTO %s: %.100s...", self.table_name, data)
         return self
     
     def update(self, data: Dict[str, Any]):
         """Mock update operation"""
-        logger.info(f"[MOCK] UPDATE {self.table_name} SET {str(data)[:100]}...")
+        logger.debug("[MOCK] UPDATE %s SET %.100s...", self.table_name, data)
         return self
     
     def eq(self, column: str, value: Any):
         """Mock equality condition"""
-        logger.info(f"[MOCK] WHERE {column} = {value}")
+        logger.debug("[MOCK] WHERE %s = %s", column, value)
         self.conditions.append((column, value))
         return self
     
     def limit(self, limit: int):
         """Mock limit operation"""
-        logger.info(f"[MOCK] LIMIT {limit}")
+        logger.debug("[MOCK] LIMIT %s", limit)
         return self
     
     def order(self, column: str, options: Dict[str, Any] = None):
@@ -232,30 +348,33 @@ class MockTableQuery:
         direction = "ASC"
         if options and options.get("ascending") is False:
             direction = "DESC"
-        logger.info(f"[MOCK] ORDER BY {column} {direction}")
+        logger.debug("[MOCK] ORDER BY %s %s", column, direction)
         return self
     
     def range(self, start: int, end: int):
         """Mock range operation"""
-        logger.info(f"[MOCK] RANGE {start} to {end}")
+        logger.debug("[MOCK] RANGE %s to %s", start, end)
         return self
     
     async def execute(self):
         """Mock execution returning empty data"""
-        logger.info(f"[MOCK] Executing query on {self.table_name}")
-        return MockResponse()
+        logger.debug("[MOCK] Executing query on %s", self.table_name)
+        return EMPTY_MOCK_RESPONSE
 
 
 class MockResponse:
     """Mock response from Supabase"""
     
     def __init__(self):
-        self.data = []
+        # Immutable so the shared empty response cannot be modified
+        self.data = ()
+
 
+# Every mock query returns the same empty response
+EMPTY_MOCK_RESPONSE = MockResponse()
 
-# Create a singleton instance
-supabase_service = SupabaseService()
 
-def get_supabase_client():
-    """Return the supabase service singleton instance."""
-    return supabase_service
\ No newline at end of file
+@functools.lru_cache(maxsize=1)
+def get_supabase_client() -> SupabaseService:
+    """Get or create the Supabase service singleton."""
+    return SupabaseService()
\ No newline at end of file
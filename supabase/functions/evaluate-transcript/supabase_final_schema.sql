@@ -62,6 +62,18 @@ CREATE TABLE public.evaluation_summaries (
     updated_at TIMESTAMPTZ DEFAULT now()
 );
 
+-- LLM Daily Costs Table (persisted cost monitoring aggregates)
+CREATE TABLE public.llm_daily_costs (
+    date DATE PRIMARY KEY,
+    input_tokens BIGINT NOT NULL DEFAULT 0,
+    output_tokens BIGINT NOT NULL DEFAULT 0,
+    cost DOUBLE PRECISION NOT NULL DEFAULT 0,
+    model_breakdown JSONB NOT NULL DEFAULT '{}'::jsonb,
+    synced_at TIMESTAMP NOT NULL,
+    created_at TIMESTAMPTZ DEFAULT now(),
+    updated_at TIMESTAMPTZ DEFAULT now()
+);
+
 -- Add indexes for faster queries
 CREATE INDEX idx_interviews_status ON public.interviews(status);
 CREATE INDEX idx_interviews_user_id ON public.interviews(user_id);
@@ -113,6 +125,7 @@ ALTER TABLE public.evaluation_results ENABLE ROW LEVEL SECURITY;
 ALTER TABLE public.criteria_evaluations ENABLE ROW LEVEL SECURITY;
 ALTER TABLE public.evaluation_criteria ENABLE ROW LEVEL SECURITY;
 ALTER TABLE public.evaluation_summaries ENABLE ROW LEVEL SECURITY;
+ALTER TABLE public.llm_daily_costs ENABLE ROW LEVEL SECURITY;
 
 -- Users can only see their own interviews
 CREATE POLICY "Users can see their own interviews"
@@ -202,12 +215,20 @@ CREATE POLICY "Service can manage evaluation summaries"
     FOR ALL
     USING (auth.role() = 'service_role');
 
+CREATE POLICY "Service can manage LLM daily costs"
+    ON public.llm_daily_costs
+    FOR ALL
+    USING (auth.role() = 'service_role');
+
 -- Add appropriate comments
 COMMENT ON TABLE public.interviews IS 'Stores interview metadata and transcript paths';
 COMMENT ON TABLE public.evaluation_results IS 'Stores overall evaluation results for interviews';
 COMMENT ON TABLE public.criteria_evaluations IS 'Stores individual criteria evaluations for interviews';
 COMMENT ON TABLE public.evaluation_criteria IS 'Stores predefined evaluation criteria for interviews';
 COMMENT ON TABLE public.evaluation_summaries IS 'Stores overall summaries of interview evaluations';
+COMMENT ON TABLE public.llm_daily_costs IS 'Stores daily LLM token and cost aggregates synced from LangSmith';
+
+COMMENT ON COLUMN public.llm_daily_costs.synced_at IS 'End of the LangSmith sync window that last updated the row (server local time).';
 
 COMMENT ON COLUMN public.interviews.status IS 'Tracks the processing state of the interview evaluation.';
 COMMENT ON COLUMN public.interviews.transcript_content IS 'Direct storage for smaller transcripts.';
@@ -0,0 +1,206 @@
+import logging
+import httpx
+import pytest
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock, patch
+from fastapi import HTTPException
+
+from app.services.alerting import Alert, AlertRule, AlertingService
+
+
+@pytest.fixture
+def mock_monitoring():
+    with patch('app.services.alerting.get_monitoring_service') as mock_get:
+        mock_service = MagicMock()
+        mock_service.get_langsmith_metrics = AsyncMock(return_value={})
+        mock_service.get_cost_projection = AsyncMock(return_value={
+            "projected_monthly_cost_usd": 600.0,  # 20 USD/day
+            "projected_monthly_tokens": 30000,  # 1000 tokens/day
+        })
+        mock_service.get_system_health = AsyncMock(return_value={
+            "error_rate_24h": 10.0
+        })
+        mock_service.create_alert = AsyncMock()
+        mock_get.return_value = mock_service
+        yield mock_service
+
+
+@pytest.mark.asyncio
+async def test_check_alert_conditions(mock_monitoring):
+    """Test that rules above threshold trigger alerts"""
+    service = AlertingService()
+    service.send_notification = AsyncMock(return_value=True)
+
+    alerts = await service.check_alert_conditions()
+
+    assert sorted(a.rule_id for a in alerts) == ["cost-threshold", "error-rate"]
+    assert mock_monitoring.create_alert.await_count == 2
+
+    # Only ERROR/CRITICAL alerts are sent as notifications
+    service.send_notification.assert_awaited_once()
+    cost_alert = next(a for a in alerts if a.rule_id == "cost-threshold")
+    assert cost_alert.notified is True
+    assert cost_alert.threshold == 10.0
+    assert "threshold: 10.0" in cost_alert.message
+
+
+@pytest.mark.asyncio
+async def test_get_and_resolve_alerts(mock_monitoring):
+    """Test filtering and resolving alerts"""
+    service = AlertingService()
+    service.send_notification = AsyncMock(return_value=True)
+    alerts = await service.check_alert_conditions()
+
+    warnings = await service.get_alerts(severity="WARNING")
+    assert [a.rule_id for a in warnings] == ["error-rate"]
+
+    latest = await service.get_alerts(limit=1)
+    assert [a.id for a in latest] == [alerts[-1].id]
+
+    resolved = await service.resolve_alert(alerts[0].id)
+    assert resolved.resolved is True
+    assert resolved.resolved_at is not None
+
+    unresolved = await service.get_alerts(resolved=False)
+    assert alerts[0].id not in [a.id for a in unresolved]
+
+    with pytest.raises(HTTPException):
+        await service.resolve_alert("missing-alert")
+
+
+@pytest.mark.asyncio
+async def test_alerts_are_bounded(mock_monitoring):
+    """Test that the oldest alerts are dropped once the buffer is full"""
+    with patch('app.services.alerting.MAX_ALERTS', 2):
+        service = AlertingService()
+    service.send_notification = AsyncMock(return_value=True)
+
+    first = await service.check_alert_conditions()
+    service._metrics_cache = None
+    second = await service.check_alert_conditions()
+
+    assert len(service.alerts) == 2
+    assert [a.id for a in await service.get_alerts()] == [a.id for a in reversed(second)]
+    assert all(service._alerts_by_id.get(a.id) is not a for a in first)
+
+
+@pytest.mark.asyncio
+async def test_update_alert_rule_comparison(mock_monitoring):
+    """Test that changing a rule's comparison re-binds its operator"""
+    service = AlertingService()
+    service.send_notification = AsyncMock(return_value=True)
+
+    await service.update_alert_rule("error-rate", {"comparison": "lt"})
+    alerts = await service.check_alert_conditions()
+    assert "error-rate" not in [a.rule_id for a in alerts]
+
+    with pytest.raises(HTTPException):
+        await service.update_alert_rule("error-rate", {"comparison": "between"})
+
+
+@pytest.mark.asyncio
+async def test_update_alert_rule_severity(mock_monitoring):
+    """Test that changing a rule's severity re-binds its log method and notification"""
+    service = AlertingService()
+    service.send_notification = AsyncMock(return_value=True)
+
+    rule = await service.update_alert_rule("error-rate", {"severity": "CRITICAL"})
+    assert rule._log == logging.getLogger('app.services.alerting').critical
+
+    alerts = await service.check_alert_conditions()
+    error_alert = next(a for a in alerts if a.rule_id == "error-rate")
+    assert error_alert.notified is True
+    assert error_alert._color == "FF0000"
+
+
+@pytest.mark.asyncio
+async def test_update_alert_rule_rejects_id_and_private_fields(mock_monitoring):
+    """Test that a rule's ID and derived fields can't be changed through updates"""
+    service = AlertingService()
+
+    for updates in ({"id": "renamed"}, {"_log": print}):
+        with pytest.raises(HTTPException) as exc_info:
+            await service.update_alert_rule("error-rate", updates)
+        assert exc_info.value.status_code == 400
+
+    assert service._rules_by_id["error-rate"].id == "error-rate"
+    assert await service.delete_alert_rule("error-rate") is True
+
+
+@pytest.mark.asyncio
+async def test_add_and_delete_alert_rule(mock_monitoring):
+    """Test adding, duplicating and deleting alert rules"""
+    service = AlertingService()
+    rule = AlertRule(
+        id="low-cost",
+        name="Low Cost",
+        description="Daily cost below threshold",
+        metric="cost_daily",
+        threshold=1.0,
+        comparison="lt",
+        severity="INFO",
+    )
+
+    await service.add_alert_rule(rule)
+    assert (await service.get_alert_rules())[-1] is rule
+
+    with pytest.raises(HTTPException):
+        await service.add_alert_rule(rule)
+
+    assert rule in service._get_active_rules()
+
+    await service.update_alert_rule("low-cost", {"enabled": False})
+    assert rule not in service._get_active_rules()
+
+    assert await service.delete_alert_rule("low-cost") is True
+    with pytest.raises(HTTPException):
+        await service.delete_alert_rule("low-cost")
+
+
+@pytest.mark.asyncio
+async def test_send_notification_fans_out():
+    """Test that every configured webhook is called and one success is enough"""
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        status = 500 if request.url.host == "teams.example" else 200
+        return httpx.Response(status)
+
+    urls = {
+        "slack": "https://slack.example/hook",
+        "teams": "https://teams.example/hook",
+        "custom": None,
+    }
+    with patch.dict('app.services.alerting.WEBHOOK_URLS', urls):
+        service = AlertingService()
+        service._http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        alert = Alert(
+            id="cost-threshold-1",
+            timestamp=datetime.now(),
+            rule_id="cost-threshold",
+            severity="ERROR",
+            message="High Cost",
+            metric="cost_daily",
+            value=20.0,
+            threshold=10.0,
+        )
+
+        assert await service.send_notification(alert) is True
+        await service.aclose()
+
+    assert sorted(r.url.host for r in requests) == ["slack.example", "teams.example"]
+
+
+@pytest.mark.asyncio
+async def test_metric_values_cached_within_window(mock_monitoring):
+    """Test that repeated checks in the same window reuse metric values"""
+    service = AlertingService()
+    service.send_notification = AsyncMock(return_value=True)
+
+    with patch('app.services.alerting.time.time', return_value=1_700_000_000.0):
+        await service.check_alert_conditions()
+        await service.check_alert_conditions()
+
+    assert mock_monitoring.get_system_health.await_count == 1
+    assert mock_monitoring.get_cost_projection.await_count == 1
@@ -0,0 +1,71 @@
+import time
+import jwt
+import pytest
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+from fastapi.security import HTTPAuthorizationCredentials
+
+from app.services import auth_service as auth_module
+from app.services.auth_service import AuthService, get_current_user
+
+SECRET = "test-jwt-secret"
+
+
+@pytest.fixture
+def auth_service(monkeypatch):
+    monkeypatch.setenv("SUPABASE_JWT_SECRET", SECRET)
+    return AuthService()
+
+
+def make_token(exp_offset: int = 3600) -> str:
+    payload = {"sub": "test-user", "exp": int(time.time()) + exp_offset}
+    return jwt.encode(payload, SECRET, algorithm="HS256")
+
+
+def test_verify_token_is_cached(auth_service):
+    """Test that a verified token is not decoded again"""
+    token = make_token()
+
+    assert auth_service.verify_token(token)["sub"] == "test-user"
+
+    with patch('app.services.auth_service.jwt.decode') as mock_decode:
+        assert auth_service.verify_token(token)["sub"] == "test-user"
+        mock_decode.assert_not_called()
+
+
+def test_expired_cached_token_is_reverified(auth_service):
+    """Test that a cached token is decoded again once it expires"""
+    token = make_token(exp_offset=60)
+    assert auth_service.verify_token(token) is not None
+
+    with patch('app.services.auth_service.time.time', return_value=time.time() + 120), \
+            patch('app.services.auth_service.jwt.decode',
+                  side_effect=jwt.ExpiredSignatureError("expired")) as mock_decode:
+        assert auth_service.verify_token(token) is None
+        mock_decode.assert_called_once()
+    assert token not in auth_service._token_cache
+
+
+def test_invalid_token_is_not_cached(auth_service):
+    """Test that tokens with a bad signature are rejected and not cached"""
+    token = jwt.encode({"sub": "test-user", "exp": int(time.time()) + 3600}, "wrong", algorithm="HS256")
+
+    assert auth_service.verify_token(token) is None
+    assert token not in auth_service._token_cache
+
+
+@pytest.mark.asyncio
+async def test_get_current_user_stored_on_request(auth_service):
+    """Test that the resolved user is reused within the same request"""
+    request = MagicMock()
+    request.state = SimpleNamespace()
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=make_token())
+
+    with patch.object(auth_module, 'auth_service', auth_service):
+        user = await get_current_user(request, credentials)
+        assert user["user_id"] == "test-user"
+        assert request.state.user is user
+
+        with patch.object(auth_service, 'verify_token') as mock_verify:
+            assert await get_current_user(request, credentials) is user
+            mock_verify.assert_not_called()
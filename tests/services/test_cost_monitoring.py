@@ -0,0 +1,339 @@
+import asyncio
+import pytest
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from app.services.cost_monitoring import CostMonitoringService, get_cost_monitoring_service
+
+
+def make_run(start_time: datetime, input_tokens: int = 1000, output_tokens: int = 500,
+             model: str = "gpt-4") -> dict:
+    return {
+        "start_time": start_time.isoformat(),
+        "input_tokens": input_tokens,
+        "output_tokens": output_tokens,
+        "extra": {"model_name": model},
+    }
+
+
+@pytest.fixture
+def mock_langsmith():
+    with patch('app.services.cost_monitoring.get_langsmith_service') as mock_get:
+        mock_service = mock_get.return_value
+        mock_service.is_configured.return_value = True
+        mock_service.runs = [make_run(datetime.now())]
+
+        async def list_runs(start_time, end_time, limit=10, strict=False):
+            runs = [
+                r for r in mock_service.runs
+                if "start_time" not in r or start_time <= r["start_time"] < end_time
+            ]
+            return runs if limit is None else runs[:limit]
+
+        mock_service.list_runs = AsyncMock(side_effect=list_runs)
+        yield mock_service
+
+
+@pytest.fixture(autouse=True)
+def mock_supabase():
+    with patch('app.services.cost_monitoring.get_supabase_client') as mock_get:
+        mock_client = MagicMock()
+        mock_client.get_daily_costs.return_value = []
+        mock_client.upsert_daily_costs.return_value = True
+        mock_get.return_value = mock_client
+        yield mock_client
+
+
+@pytest.fixture
+def mock_monitoring():
+    with patch('app.services.cost_monitoring.get_monitoring_service') as mock_get:
+        mock_service = MagicMock()
+        mock_service.record_metric = AsyncMock()
+        mock_service.record_metrics = AsyncMock()
+        mock_service.create_alert = AsyncMock()
+        mock_get.return_value = mock_service
+        yield mock_service
+
+
+@pytest.mark.asyncio
+async def test_sync_aggregates_runs(mock_langsmith, mock_monitoring):
+    """Test that runs are grouped into daily cost records"""
+    now = datetime.now()
+    mock_langsmith.runs = [
+        make_run(now),
+        make_run(now, model="gpt-3.5-turbo"),
+        make_run(now - timedelta(days=1)),
+        {"start_time": now.isoformat()},  # no token info
+        {"input_tokens": 10, "output_tokens": 10},  # no start time
+    ]
+    service = CostMonitoringService()
+
+    daily = await service.get_daily_costs(days=7)
+
+    assert [d["date"] for d in daily] == [
+        now.date().isoformat(),
+        (now - timedelta(days=1)).date().isoformat(),
+    ]
+    today = daily[0]
+    assert today["input_tokens"] == 2000
+    assert today["total_tokens"] == 3000
+    assert today["model_breakdown"]["gpt-4"] == pytest.approx(0.06)
+    assert today["model_breakdown"]["gpt-3.5-turbo"] == pytest.approx(0.002)
+    assert today["cost"] == pytest.approx(0.062)
+    assert service.daily_costs[today["date"]].cost_micro_usd == 62_000
+
+
+@pytest.mark.asyncio
+async def test_sync_skipped_within_ttl(mock_langsmith, mock_monitoring):
+    """Test that repeated reads within the TTL reuse the last sync"""
+    service = CostMonitoringService()
+
+    await service.get_daily_costs()
+    fetches = mock_langsmith.list_runs.await_count
+    await service.get_monthly_summary()
+    await service.get_cost_projection()
+
+    assert mock_langsmith.list_runs.await_count == fetches
+
+    service._last_sync_monotonic -= service._sync_ttl_seconds + 1
+    await service.get_cost_projection()
+    assert mock_langsmith.list_runs.await_count == fetches + 1
+
+
+@pytest.mark.asyncio
+async def test_concurrent_syncs_share_one_request(mock_langsmith, mock_monitoring):
+    """Test that concurrent callers wait for the in-flight sync"""
+    list_runs = mock_langsmith.list_runs.side_effect
+
+    async def slow_list_runs(**kwargs):
+        await asyncio.sleep(0.01)
+        return await list_runs(**kwargs)
+
+    mock_langsmith.list_runs.side_effect = slow_list_runs
+    service = CostMonitoringService()
+
+    await service.sync_with_langsmith()
+    fetches = mock_langsmith.list_runs.await_count
+    service.last_sync = None
+    service._last_sync_monotonic = None
+    service.daily_costs = {}
+
+    await asyncio.gather(*(service.sync_with_langsmith() for _ in range(5)))
+
+    assert mock_langsmith.list_runs.await_count == 2 * fetches
+    assert service.daily_costs[datetime.now().date().isoformat()].input_tokens == 1000
+
+
+@pytest.mark.asyncio
+async def test_monthly_summary_only_counts_current_month(mock_langsmith, mock_monitoring):
+    """Test that the monthly summary ignores records from earlier months"""
+    now = datetime.now()
+    last_month = now.replace(day=1) - timedelta(days=1)
+    mock_langsmith.runs = [make_run(now), make_run(last_month), make_run(now)]
+    service = CostMonitoringService()
+
+    summary = await service.get_monthly_summary()
+
+    assert len(service.daily_costs) == 2
+    assert summary["monthly_input_tokens"] == 2000
+    assert summary["monthly_cost_to_date"] == pytest.approx(0.12)
+    assert summary["model_breakdown"] == {"gpt-4": pytest.approx(0.12)}
+
+
+@pytest.mark.asyncio
+async def test_monthly_totals_invalidated_on_sync(mock_langsmith, mock_monitoring):
+    """Test that cached monthly totals are recomputed after new runs are synced"""
+    service = CostMonitoringService()
+
+    first = await service.get_monthly_summary()
+    assert first["monthly_input_tokens"] == 1000
+    assert len(service._monthly_totals) == 1
+
+    mock_langsmith.runs.append(make_run(datetime.now()))
+    service._sync_ttl_seconds = 0
+    second = await service.get_monthly_summary()
+    assert second["monthly_input_tokens"] == 2000
+
+
+@pytest.mark.asyncio
+async def test_initial_sync_fetches_ranges_concurrently(mock_langsmith, mock_monitoring):
+    """Test that the 30-day backfill is split into ranges and failed ranges are retried"""
+    calls = []
+
+    async def list_runs(start_time, end_time, **kwargs):
+        calls.append((start_time, end_time))
+        if len(calls) == 1:
+            raise RuntimeError("temporary failure")
+        return []
+
+    mock_langsmith.list_runs.side_effect = list_runs
+    service = CostMonitoringService()
+
+    await service.sync_with_langsmith()
+
+    assert len(calls) == 11  # 10 ranges of 3 days + retry of the failed one
+    assert calls[-1] == calls[0]
+    assert len(set(calls)) == 10
+    assert service.last_sync is not None
+
+
+@pytest.mark.asyncio
+async def test_sync_fetches_every_run_in_range(mock_langsmith, mock_monitoring):
+    """Test that ranges are fetched without a run limit and without mock fallback"""
+    now = datetime.now()
+    mock_langsmith.runs = [make_run(now) for _ in range(25)]
+    service = CostMonitoringService()
+
+    daily = await service.get_daily_costs()
+
+    assert daily[0]["input_tokens"] == 25_000
+    assert all(c.kwargs["limit"] is None and c.kwargs["strict"] is True
+               for c in mock_langsmith.list_runs.await_args_list)
+
+
+@pytest.mark.asyncio
+async def test_failed_range_does_not_advance_sync(mock_langsmith, mock_monitoring):
+    """Test that a range that keeps failing aborts the sync without moving last_sync"""
+    list_runs = mock_langsmith.list_runs.side_effect
+    started = datetime.now().isoformat()
+
+    async def failing_list_runs(**kwargs):
+        # The most recent range fails on the first attempt and on the retry
+        if kwargs["end_time"] >= started:
+            raise RuntimeError("stream interrupted")
+        return await list_runs(**kwargs)
+
+    mock_langsmith.list_runs.side_effect = failing_list_runs
+    service = CostMonitoringService()
+
+    with pytest.raises(RuntimeError):
+        await service.sync_with_langsmith()
+
+    assert service.last_sync is None
+    assert service.daily_costs == {}
+
+    mock_langsmith.list_runs.side_effect = list_runs
+    await service.sync_with_langsmith()
+    assert service.daily_costs[datetime.now().date().isoformat()].input_tokens == 1000
+
+
+@pytest.mark.asyncio
+async def test_persisted_costs_are_loaded_and_saved(mock_langsmith, mock_monitoring, mock_supabase):
+    """Test that a cold start resumes from persisted records and saves synced ones"""
+    now = datetime.now()
+    last_sync = now - timedelta(hours=1)
+    yesterday = (now - timedelta(days=1)).date().isoformat()
+    mock_supabase.get_daily_costs.return_value = [{
+        "date": yesterday,
+        "input_tokens": 100,
+        "output_tokens": 50,
+        "cost": 1.5,
+        "model_breakdown": {"gpt-4": 1.5},
+        "synced_at": last_sync.isoformat(),
+    }]
+    service = CostMonitoringService()
+
+    daily = await service.get_daily_costs()
+
+    assert [d["date"] for d in daily] == [now.date().isoformat(), yesterday]
+    # Only the window since the persisted sync is fetched
+    assert all(c.kwargs["start_time"] >= last_sync.isoformat()
+               for c in mock_langsmith.list_runs.await_args_list)
+    mock_langsmith.list_runs.assert_awaited_once()
+
+    (saved,), _ = mock_supabase.upsert_daily_costs.call_args
+    assert [r["date"] for r in saved] == [now.date().isoformat()]
+    assert saved[0]["input_tokens"] == 1000
+
+
+@pytest.mark.asyncio
+async def test_failed_cost_load_is_retried(mock_langsmith, mock_monitoring, mock_supabase):
+    """Test that a failed persisted-cost load skips the sync and is retried"""
+    mock_supabase.get_daily_costs.return_value = None
+    service = CostMonitoringService()
+
+    await service.sync_with_langsmith()
+
+    assert service._loaded is False
+    assert service.last_sync is None
+    mock_langsmith.list_runs.assert_not_awaited()
+
+    mock_supabase.get_daily_costs.return_value = []
+    await service.sync_with_langsmith()
+    assert service._loaded is True
+    assert mock_supabase.get_daily_costs.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_cost_load_skipped_when_langsmith_unconfigured(mock_langsmith, mock_monitoring, mock_supabase):
+    """Test that cost reads work without LangSmith even if persisted costs can't be loaded"""
+    mock_langsmith.is_configured.return_value = False
+    mock_supabase.get_daily_costs.return_value = None
+    service = CostMonitoringService()
+
+    assert await service.get_daily_costs() == []
+    summary = await service.get_monthly_summary()
+
+    assert summary["monthly_cost_to_date"] == 0
+    mock_supabase.get_daily_costs.assert_not_called()
+    mock_langsmith.list_runs.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("today, expected", [
+    (datetime(2024, 2, 10, 15, 30), 19),  # leap year
+    (datetime(2024, 12, 31, 8, 0), 0),
+    (datetime(2025, 12, 1, 0, 0), 30),
+])
+async def test_monthly_summary_days_remaining(mock_monitoring, today, expected):
+    """Test days remaining in the month, including December and leap years"""
+    service = CostMonitoringService()
+    service.sync_with_langsmith = AsyncMock()
+
+    with patch('app.services.cost_monitoring.datetime') as mock_datetime:
+        mock_datetime.now.return_value = today
+        mock_datetime.side_effect = lambda *args, **kwargs: datetime(*args, **kwargs)
+        summary = await service.get_monthly_summary()
+
+    assert summary["days_remaining"] == expected
+
+
+@pytest.mark.asyncio
+async def test_budget_alert_raised_once_per_day_per_level(mock_langsmith, mock_monitoring):
+    """Test that budget alerts are debounced per level and escalate to ERROR"""
+    service = CostMonitoringService()
+    service.budget_threshold = 0.07  # today's run costs 0.06, i.e. above 80%
+    await service.sync_with_langsmith()
+
+    await service.check_budget_threshold()
+    assert [c.kwargs["level"] for c in mock_monitoring.create_alert.await_args_list] == ["WARNING"]
+
+    service.budget_threshold = 0.05
+    await service.check_budget_threshold()
+    await service.check_budget_threshold()
+    assert [c.kwargs["level"] for c in mock_monitoring.create_alert.await_args_list] == ["WARNING", "ERROR"]
+
+
+@pytest.mark.asyncio
+async def test_monitoring_metrics_recorded_in_one_batch(mock_langsmith, mock_monitoring):
+    """Test that cost metrics are sent as a single batch"""
+    service = CostMonitoringService()
+    await service.sync_with_langsmith()
+    mock_monitoring.record_metrics.reset_mock()
+
+    await service.update_monitoring_metrics()
+
+    mock_monitoring.record_metrics.assert_awaited_once()
+    (metrics,), _ = mock_monitoring.record_metrics.await_args
+    assert metrics["llm_monthly_input_tokens"] == 1000
+    assert len(metrics) == 5
+    mock_monitoring.record_metric.assert_not_awaited()
+
+
+def test_get_cost_monitoring_service_is_singleton(mock_monitoring):
+    """Test that the service is only constructed once"""
+    get_cost_monitoring_service.cache_clear()
+    try:
+        assert get_cost_monitoring_service() is get_cost_monitoring_service()
+    finally:
+        get_cost_monitoring_service.cache_clear()
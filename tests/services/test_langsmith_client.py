@@ -0,0 +1,225 @@
+import threading
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+import pytest
+from unittest.mock import MagicMock, patch
+
+from app.services.langsmith.client import LangSmithService, get_langsmith_service
+
+
+@pytest.fixture
+def langsmith(monkeypatch):
+    monkeypatch.setattr('app.services.langsmith.client.TRACE_FLUSH_INTERVAL_SECONDS', 0.01)
+    service = LangSmithService()
+    service.client = MagicMock()
+    service.initialized = True
+    service._live = True
+    return service
+
+
+@pytest.mark.asyncio
+async def test_runs_are_written_in_background(langsmith):
+    """Test that trace/update calls only queue writes and aclose flushes them"""
+    run_id = await langsmith.trace_run(name="evaluate", inputs={"interview_id": "1"})
+    assert await langsmith.update_run(run_id, outputs={"score": 1}) is True
+    langsmith.client.batch_ingest_runs.assert_not_called()
+
+    await langsmith.aclose()
+
+    # The create and the update go out in a single ingest request
+    langsmith.client.batch_ingest_runs.assert_called_once()
+    kwargs = langsmith.client.batch_ingest_runs.call_args.kwargs
+    (create,), (update,) = kwargs["create"], kwargs["update"]
+    assert create["id"] == create["trace_id"] == run_id
+    assert create["run_type"] == "chain"
+    assert create["dotted_order"].endswith(run_id)
+    assert update["dotted_order"] == create["dotted_order"]
+    assert update["outputs"] == {"score": 1}
+
+
+@pytest.mark.asyncio
+async def test_full_queue_drops_writes(langsmith):
+    """Test that writes are dropped instead of blocking once the queue is full"""
+    with patch('app.services.langsmith.client.TRACE_QUEUE_MAXSIZE', 1):
+        first = await langsmith.trace_run(name="first", inputs={})
+        second = await langsmith.trace_run(name="second", inputs={})
+
+    assert not first.startswith("mock-")
+    assert second.startswith("mock-")
+    assert await langsmith.update_run(first, outputs={}) is False
+
+    await langsmith.aclose()
+    (create,) = langsmith.client.batch_ingest_runs.call_args.kwargs["create"]
+    assert create["id"] == first
+
+
+@pytest.mark.asyncio
+async def test_update_of_unknown_run_is_rejected(langsmith):
+    """Test that updates need a run created by this service"""
+    assert await langsmith.update_run("not-created-here", outputs={}) is False
+    await langsmith.aclose()
+    langsmith.client.batch_ingest_runs.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_list_runs_runs_off_the_event_loop(langsmith):
+    """Test that the blocking SDK listing runs on the SDK thread pool"""
+    threads = []
+
+    def list_runs(**kwargs):
+        threads.append(threading.current_thread().name)
+        return iter([])
+
+    langsmith.client.list_runs.side_effect = list_runs
+
+    assert await langsmith.list_runs(start_time="2025-01-01T00:00:00") == []
+    assert threads[0].startswith("langsmith")
+    langsmith.close()
+
+
+@pytest.mark.asyncio
+async def test_closed_service_falls_back_to_mock(langsmith):
+    """Test that calls after aclose() no longer reach the SDK"""
+    await langsmith.aclose()
+
+    assert langsmith.is_configured() is False
+    assert (await langsmith.trace_run(name="late", inputs={})).startswith("mock-")
+
+
+@pytest.mark.asyncio
+async def test_get_run_metrics_aggregates_runs(langsmith):
+    """Test that run metrics are computed from the listed runs"""
+    start = datetime(2025, 1, 1, 12, 0, 0)
+    langsmith.client.list_runs.return_value = iter([
+        SimpleNamespace(error=None, run_type="chain", start_time=start, end_time=start + timedelta(seconds=2)),
+        SimpleNamespace(error="boom", run_type="llm", start_time=start, end_time=start + timedelta(seconds=4)),
+        SimpleNamespace(error=None, run_type="llm", start_time=start, end_time=None),
+    ])
+
+    metrics = await langsmith.get_run_metrics(days=1)
+
+    assert metrics["total_runs"] == 3
+    assert metrics["error_runs"] == 1
+    assert metrics["success_rate"] == pytest.approx(2 / 3)
+    assert metrics["average_latency_seconds"] == pytest.approx(3.0)
+    assert metrics["run_types"] == {"chain": 1, "llm": 2}
+    langsmith.close()
+
+
+@pytest.mark.asyncio
+async def test_iter_runs_streams_selected_fields(langsmith):
+    """Test that runs are streamed page by page with only the serialized fields"""
+    start = datetime(2025, 1, 1, 12, 0, 0)
+    langsmith.client.list_runs.return_value = iter([
+        SimpleNamespace(id=i, name=f"run-{i}", start_time=start, end_time=None, status=None)
+        for i in range(3)
+    ])
+
+    with patch('app.services.langsmith.client.RUN_PAGE_SIZE', 2):
+        runs = [run async for run in langsmith.iter_runs(limit=3)]
+
+    assert [r["id"] for r in runs] == [0, 1, 2]
+    assert runs[0] == {
+        "id": 0, "name": "run-0", "start_time": str(start), "end_time": None,
+        "status": "success", "error": None, "extra": {}
+    }
+    assert "start_time" in langsmith.client.list_runs.call_args.kwargs["select"]
+    langsmith.close()
+
+
+@pytest.mark.asyncio
+async def test_listed_runs_include_usage_fields(langsmith):
+    """Test that LLM runs carry token counts and model name, and parent runs don't double count"""
+    start = datetime(2025, 1, 1, 12, 0, 0)
+    langsmith.client.list_runs.return_value = iter([
+        SimpleNamespace(id=1, name="llm", start_time=start, end_time=None, status="error",
+                        error="boom", run_type="llm", prompt_tokens=100, completion_tokens=20,
+                        extra={"invocation_params": {"model_name": "gpt-4"}}),
+        SimpleNamespace(id=2, name="chain", start_time=start, end_time=None, status=None,
+                        error=None, run_type="chain", prompt_tokens=100, completion_tokens=20,
+                        extra=None),
+    ])
+
+    llm, chain = await langsmith.list_runs(limit=None)
+
+    assert (llm["input_tokens"], llm["output_tokens"], llm["error"]) == (100, 20, "boom")
+    assert llm["extra"]["model_name"] == "gpt-4"
+    assert "input_tokens" not in chain and chain["extra"] == {}
+    select = langsmith.client.list_runs.call_args.kwargs["select"]
+    assert {"prompt_tokens", "completion_tokens", "error", "extra"} <= set(select)
+    langsmith.close()
+
+
+@pytest.mark.asyncio
+async def test_strict_iter_runs_raises_mid_stream(langsmith):
+    """Test that strict listing surfaces SDK failures instead of partial or mock runs"""
+    start = datetime(2025, 1, 1, 12, 0, 0)
+
+    def runs():
+        yield SimpleNamespace(id=0, name="run-0", start_time=start, end_time=None, status=None)
+        raise RuntimeError("stream interrupted")
+
+    with patch('app.services.langsmith.client.RUN_PAGE_SIZE', 1):
+        langsmith.client.list_runs.return_value = runs()
+        assert [r["id"] for r in await langsmith.list_runs(limit=None)] == [0]
+
+        langsmith.client.list_runs.return_value = runs()
+        with pytest.raises(RuntimeError):
+            await langsmith.list_runs(limit=None, strict=True)
+    assert langsmith.client.list_runs.call_args.kwargs["limit"] is None
+
+    langsmith._live = False
+    with pytest.raises(RuntimeError):
+        await langsmith.list_runs(strict=True)
+    assert len(await langsmith.list_runs(limit=None)) == 5
+    langsmith.close()
+
+
+def test_callback_handlers_are_cached(langsmith):
+    """Test that handlers are reused per run name and tags until the client changes"""
+    handler = langsmith.get_callback_handler(run_name="evaluate", tags=["api"])
+
+    assert langsmith.get_callback_handler(run_name="evaluate", tags=["api"]) is handler
+    assert langsmith.get_callback_handler(run_name="evaluate") is not handler
+    assert handler.client is langsmith.client
+
+    langsmith.close()
+    assert langsmith.get_callback_handler(run_name="evaluate", tags=["api"]).client is None
+
+
+@pytest.mark.asyncio
+async def test_circuit_breaker_skips_failing_sdk(langsmith):
+    """Test that repeated failures send calls straight to mock data for a cooldown"""
+    langsmith.client.list_runs.side_effect = RuntimeError("unavailable")
+
+    with patch('app.services.langsmith.client.CIRCUIT_FAILURE_THRESHOLD', 2):
+        await langsmith.list_runs()
+        await langsmith.list_runs()
+        langsmith.client.list_runs.reset_mock()
+
+        runs = await langsmith.list_runs()
+        assert all(r["id"].startswith("mock-") for r in runs)
+        langsmith.client.list_runs.assert_not_called()
+        assert (await langsmith.trace_run(name="during-outage", inputs={})).startswith("mock-")
+
+        # After the cooldown the SDK is tried again and a success closes the breaker
+        langsmith._open_until = 0.0
+        langsmith.client.list_runs.side_effect = None
+        langsmith.client.list_runs.return_value = iter([])
+        await langsmith.list_runs()
+        assert langsmith._failures == 0
+    langsmith.close()
+
+
+@pytest.mark.asyncio
+async def test_disabled_service_is_a_no_op(monkeypatch):
+    """Test that LANGSMITH_ENABLED=false swaps in the no-op service"""
+    monkeypatch.setenv("LANGSMITH_ENABLED", "false")
+    get_langsmith_service.cache_clear()
+    try:
+        service = get_langsmith_service()
+        assert service.is_configured() is False
+        assert await service.trace_run(name="evaluate", inputs={}) is None
+        assert await service.list_runs() == []
+    finally:
+        get_langsmith_service.cache_clear()
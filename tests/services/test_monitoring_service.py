@@ -0,0 +1,175 @@
+import json
+import httpx
+import pytest
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+from fastapi import HTTPException
+
+from app.services.langsmith.client import LangSmithService
+from app.services.monitoring import MAX_METRIC_VALUES, MetricValue, MonitoringService
+
+
+@pytest.mark.asyncio
+async def test_critical_alert_notifies_all_webhooks():
+    """Test that critical alerts are posted to every webhook over one shared client"""
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        status = 500 if request.url.host == "down.example" else 200
+        return httpx.Response(status)
+
+    service = MonitoringService()
+    service.webhook_endpoints = ["https://up.example/hook", "https://down.example/hook"]
+    service._http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    client = service._http
+
+    await service.create_alert(level="CRITICAL", message="Evaluations failing", source="test")
+    await service.create_alert(level="WARNING", message="Slow evaluations", source="test")
+
+    assert sorted(r.url.host for r in requests) == ["down.example", "up.example"]
+    assert requests[0].content == requests[1].content
+    assert json.loads(requests[0].content)["text"] == "🚨 *CRITICAL ALERT*: Evaluations failing"
+    assert service._get_http_client() is client
+
+    await service.aclose()
+    assert client.is_closed
+
+
+@pytest.mark.asyncio
+async def test_alerts_are_indexed_and_bounded():
+    """Test that alerts are looked up by ID and the oldest are dropped when full"""
+    with patch('app.services.monitoring.MAX_ALERTS', 2):
+        service = MonitoringService()
+
+    first = await service.create_alert(level="INFO", message="first", source="test")
+    second = await service.create_alert(level="INFO", message="second", source="test")
+
+    assert (await service.acknowledge_alert(second.id)).acknowledged is True
+    assert (await service.resolve_alert(first.id)).resolved is True
+
+    third = await service.create_alert(level="INFO", message="third", source="test")
+    assert third.id not in (first.id, second.id)
+    assert [a.id for a in await service.get_alerts()] == [second.id, third.id]
+    with pytest.raises(HTTPException):
+        await service.resolve_alert(first.id)
+
+
+@pytest.mark.asyncio
+async def test_metric_values_are_bounded():
+    """Test that only the most recent values are kept per metric"""
+    service = MonitoringService()
+
+    with patch('app.services.monitoring.MAX_METRIC_VALUES', 3):
+        for i in range(5):
+            await service.record_metric("custom", i)
+    for i in range(MAX_METRIC_VALUES + 1):
+        await service.record_metric("api_requests", 1)
+
+    assert [v.value for v in service.metrics["custom"].values] == [2, 3, 4]
+    assert len(service.metrics["api_requests"].values) == MAX_METRIC_VALUES
+
+
+@pytest.mark.asyncio
+async def test_system_health_only_counts_last_24h():
+    """Test that health uses alerts and metric values from the last 24 hours"""
+    service = MonitoringService()
+    old = datetime.now() - timedelta(days=2)
+    service.metrics["api_requests"].values.extend([
+        MetricValue(timestamp=old, value=100),
+        MetricValue(timestamp=datetime.now(), value=10),
+    ])
+    service.metrics["error_count"].values.extend([
+        MetricValue(timestamp=old, value=50),
+        MetricValue(timestamp=datetime.now(), value=1),
+    ])
+    stale = await service.create_alert(level="CRITICAL", message="old", source="test")
+    stale.timestamp = old
+
+    health = await service.get_system_health()
+
+    assert health["api_requests_24h"] == 10
+    assert health["error_rate_24h"] == pytest.approx(10.0)
+    assert health["unresolved_critical_alerts"] == 0
+    assert health["status"] == "degraded"
+
+
+@pytest.mark.asyncio
+async def test_get_metrics_filters_by_time_range():
+    """Test that unfiltered metrics are returned as-is and filtered ones are projected"""
+    service = MonitoringService()
+    service.metrics["api_requests"].values.extend([
+        MetricValue(timestamp=datetime.now() - timedelta(days=2), value=100),
+        MetricValue(timestamp=datetime.now(), value=10),
+    ])
+
+    everything = await service.get_metrics()
+    assert everything["api_requests"] is service.metrics["api_requests"]
+
+    recent = await service.get_metrics("api_requests", time_range=timedelta(hours=1))
+    assert [v.value for v in recent["api_requests"].values] == [10]
+    assert len(service.metrics["api_requests"].values) == 2
+
+    with pytest.raises(HTTPException):
+        await service.get_metrics("missing", time_range=timedelta(hours=1))
+
+
+@pytest.mark.asyncio
+async def test_metric_rows_are_stored_in_batches():
+    """Test that metric rows are buffered and inserted in bulk"""
+    supabase = MagicMock()
+    insert = supabase.from_.return_value.insert
+    insert.return_value.execute = AsyncMock()
+    service = MonitoringService(supabase_client=supabase)
+
+    with patch('app.services.monitoring.METRIC_FLUSH_BATCH_SIZE', 3):
+        for i in range(4):
+            await service.record_metric("api_requests", i)
+
+    insert.assert_called_once()
+    (rows,), _ = insert.call_args
+    assert [r["value"] for r in rows] == [0, 1, 2]
+
+    await service.aclose()
+    assert [r["value"] for r in insert.call_args.args[0]] == [3]
+    assert service._flusher_task is None
+
+
+@pytest.mark.asyncio
+async def test_get_alerts_time_range_only_returns_recent():
+    """Test that time-range filtering keeps recent alerts in creation order"""
+    service = MonitoringService()
+    old = await service.create_alert(level="WARNING", message="old", source="test")
+    old.timestamp = datetime.now() - timedelta(days=2)
+    first = await service.create_alert(level="WARNING", message="first", source="test")
+    second = await service.create_alert(level="INFO", message="second", source="test")
+
+    recent = await service.get_alerts(time_range=timedelta(hours=1))
+    assert [a.id for a in recent] == [first.id, second.id]
+
+    warnings = await service.get_alerts(level="WARNING", time_range=timedelta(hours=1))
+    assert [a.id for a in warnings] == [first.id]
+
+
+@pytest.mark.asyncio
+async def test_langsmith_metrics_from_listed_runs():
+    """Test run metrics computed from the runs list_runs returns, real and mock"""
+    start = datetime(2025, 1, 1, 12, 0, 0)
+    sdk_run = LangSmithService._run_to_dict(SimpleNamespace(
+        id=1, name="llm", start_time=start, end_time=start + timedelta(seconds=4),
+        status="error", error="boom", run_type="llm",
+        prompt_tokens=1000, completion_tokens=500, extra={}
+    ))
+    mock_runs = await LangSmithService().list_runs(limit=1)
+    langsmith = MagicMock()
+    langsmith.list_runs = AsyncMock(return_value=[sdk_run] + mock_runs)
+    service = MonitoringService(langsmith_client=langsmith)
+
+    metrics = await service.get_langsmith_metrics()
+
+    assert metrics["total_runs"] == 2
+    assert metrics["failed_runs"] == 1
+    assert metrics["average_latency_seconds"] == pytest.approx(32.0)  # 4s and 60s
+    assert metrics["input_tokens"] == 1000
+    assert metrics["total_tokens"] == 1500
@@ -1,6 +1,8 @@
+import json
+import httpx
 import pytest
 from unittest.mock import MagicMock, patch
-from app.services.supabase_client import SupabaseService
+from app.services.supabase_client import SupabaseService, get_supabase_client
 
 @pytest.fixture
 def mock_supabase_client():
@@ -90,4 +92,88 @@ def test_get_usage_statistics(mock_supabase_client):
     assert "by_status" in result
     assert "daily_counts" in result
     assert result["by_status"]["evaluated"] == 1
-    assert result["by_status"]["processing"] == 1
\ No newline at end of file
+    assert result["by_status"]["processing"] == 1
+
+@pytest.mark.asyncio
+async def test_writes_go_through_async_rest_client(mock_supabase_client, monkeypatch):
+    """Test that evaluation writes are sent to PostgREST over the shared async client"""
+    monkeypatch.setenv("SUPABASE_URL", "https://db.example")
+    monkeypatch.setenv("SUPABASE_KEY", "test-key")
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(200, json=[{"id": "interview-1"}])
+
+    service = SupabaseService()
+    service._rest = httpx.AsyncClient(
+        base_url="https://db.example/rest/v1",
+        transport=httpx.MockTransport(handler)
+    )
+    client = service._rest
+
+    assert await service.store_evaluation_results("interview-1", {"overall_score": 4}) is True
+    assert await service.update_interview_status("interview-1", "evaluated") is True
+
+    insert, update = requests
+    assert (insert.method, insert.url.path) == ("POST", "/rest/v1/evaluations")
+    assert json.loads(insert.content)["results"] == {"overall_score": 4}
+    assert (update.method, update.url.params["id"]) == ("PATCH", "eq.interview-1")
+    mock_supabase_client['table'].assert_not_called()
+
+    await service.aclose()
+    assert client.is_closed
+
+
+def test_get_supabase_client_is_lazy_singleton(mock_supabase_client):
+    """Test that the service is only constructed on first use"""
+    get_supabase_client.cache_clear()
+    try:
+        with patch('app.services.supabase_client.SupabaseService') as mock_service:
+            assert get_supabase_client() is get_supabase_client()
+            mock_service.assert_called_once()
+    finally:
+        get_supabase_client.cache_clear()
+
+
+def test_is_connected_reuses_recent_result(mock_supabase_client, monkeypatch):
+    """Test that connection checks are cached until the TTL expires"""
+    monkeypatch.setenv("SUPABASE_URL", "https://db.example")
+    monkeypatch.setenv("SUPABASE_KEY", "test-key")
+    service = SupabaseService()
+    get_user = mock_supabase_client['auth'].get_user
+
+    assert service.is_connected() is True
+    assert service.is_connected() is True
+    assert get_user.call_count == 1
+
+    service._connected_checked_at -= 10
+    assert service.is_connected() is True
+    assert get_user.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_create_interviews_bulk_uses_one_request(mock_supabase_client, monkeypatch):
+    """Test that several interviews are created with a single insert"""
+    monkeypatch.setenv("SUPABASE_URL", "https://db.example")
+    monkeypatch.setenv("SUPABASE_KEY", "test-key")
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(201, json=[{"id": "a"}, {"id": "b"}])
+
+    service = SupabaseService()
+    service._rest = httpx.AsyncClient(
+        base_url="https://db.example/rest/v1",
+        transport=httpx.MockTransport(handler)
+    )
+
+    rows = await service.create_interviews_bulk([{"candidate_name": "Ada"}, {}])
+
+    assert [r["id"] for r in rows] == ["a", "b"]
+    (request,) = requests
+    sent = json.loads(request.content)
+    assert [r["candidate_name"] for r in sent] == ["Ada", "Unknown Candidate"]
+    assert sent[0]["created_at"] == sent[1]["created_at"]
+    await service.aclose()